@@ -0,0 +1,4 @@
+from .session import SolveSession
+from .solver import DancingLinks, SudokuSolver
+from .stats import SolveStats
+from .stream import iter_puzzles, solve_stream
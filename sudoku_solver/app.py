@@ -1,29 +1,69 @@
 import argparse
 import os
+import sys
 
-from .solver import SudokuSolver
+from .solver import STRATEGIES, SudokuSolver
+from .tables import SIZES
 
 def main():
+    if sys.argv[1:2] == ["serve"]:
+        from . import server
+        server.main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(description="A command-line Sudoku solver.")
-    parser.add_argument('--file', required=True, help='Path to the Sudoku puzzle file.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--file', help='Path to the Sudoku puzzle file.')
+    source.add_argument('--batch', help='Path to a file with one puzzle per line (size * size characters, 0 or . for blanks).')
+    source.add_argument('--images', help='Directory or glob pattern of puzzle images to read and solve.')
+    parser.add_argument("-o", "--output", help="Where to write the solutions in batch or images mode.")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes in batch mode. Defaults to the available cores.")
     parser.add_argument("-v", "--verbose", default=False, help="Enable verbose output.")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode.")
     parser.add_argument("-m", "--model", default="mnist.onnx", help="Path to the ONNX model file.")
+    parser.add_argument("--profile", default="robust", choices=("fast", "robust"), help="Image preprocessing profile. Falls back to robust when no grid is found.")
+    parser.add_argument("--offline", action="store_true", help="Never download the model; --model must point at a local file.")
+    parser.add_argument("--size", type=int, default=9, choices=SIZES, help="Board size (rows per board). Digits above 9 are written A-P.")
+    parser.add_argument("-s", "--strategy", default=None, choices=STRATEGIES, help="Solving strategy to use. Defaults to the fastest for the board size.")
+    parser.add_argument("--max-nodes", type=int, default=None, help="Stop the iterative search after this many trial placements.")
+    parser.add_argument("--time-limit", type=float, default=None, help="Stop the iterative search after this many seconds.")
+    parser.add_argument("--parallel", action="store_true", help="Split the search for a single puzzle across worker processes.")
+    parser.add_argument("--cache", help="Path to an sqlite file caching solutions across runs, shared by symmetric variants of a puzzle.")
+    parser.add_argument("--check-unique", action="store_true", help="Only report whether the puzzle has no, one or several solutions.")
     args = parser.parse_args()
 
-    solver = SudokuSolver()
+    if (args.max_nodes is not None or args.time_limit is not None) and args.strategy != "iterative":
+        parser.error("--max-nodes and --time-limit require --strategy iterative")
+
+    if args.batch:
+        if not args.output:
+            parser.error("--batch requires --output")
+        run_batch(args)
+        return
+
+    if args.images:
+        if not args.output:
+            parser.error("--images requires --output")
+        run_images(args)
+        return
+
+    cache = None
+    if args.cache:
+        from .cache import SolutionCache
+        cache = SolutionCache(path=args.cache, size=args.size)
+    solver = SudokuSolver(args.strategy, size=args.size, cache=cache)
     if (args.file.endswith('.csv')):
         solver.load_csv(args.file)
     else:
         # attempt to load it as image
         from . import image_process
         # Download and load the deep learning model
-        model_path = image_process.download_model(args.model)
+        model_path = image_process.download_model(args.model, args.offline)
         if model_path is None:
             print("Could not download or find the model. Exiting.")
             return
 
-        extracted_board = image_process.extract_sudoku_board(args.file, model_path, args.debug)
+        extracted_board = image_process.extract_sudoku_board(args.file, model_path, args.debug, args.profile)
         if extracted_board is None:
             print("Failed to extract Sudoku board from image")
             return
@@ -31,24 +71,138 @@ def main():
     
     print("\n==== Input Board ====")
     solver.display_board()
+
+    if args.parallel:
+        run_parallel(args, solver)
+        return
+
+    if args.check_unique:
+        count = solver.count_solutions(limit=2)
+        if count == 0:
+            print("\nThe puzzle has no solution.")
+        elif count == 1:
+            print("\nThe puzzle has a unique solution.")
+        else:
+            print("\nThe puzzle has more than one solution.")
+        return
     
     number_of_blanks = solver.get_empty_cell_count()
     print(f"\nThere are {number_of_blanks} empty cells.")
-    if number_of_blanks == 9*9:
+    if number_of_blanks == args.size * args.size:
         print("Empty Sudoku board cannot be solved!")
         return
 
-    solver.solve()
+    if args.strategy == "iterative":
+        stats = solver.solve(args.max_nodes, args.time_limit)
+    else:
+        stats = solver.solve()
 
     # display the result
     print("\n=== Complete Board ==")
     solver.display_board()
+    print(f"\nSearch explored {stats.nodes} nodes using the '{solver.strategy}' strategy "
+          f"({stats.backtracks} backtracks, max depth {stats.max_depth}).")
+    for phase, seconds in stats.phase_times.items():
+        print(f"  {phase}: {seconds * 1000:.3f} ms, {stats.cells_filled[phase]} cells filled")
+    if cache is not None:
+        print(f"Cache: {cache.hits} hits, {cache.disk_hits} disk hits, {cache.misses} misses.")
+    if solver.strategy == "propagate":
+        hits = ", ".join(f"{name}={count}" for name, count in stats.technique_hits.items() if count)
+        print(f"Propagation hits: {hits or 'none'}")
 
     # in case the board is invalid or imposolverible to solve
-    if solver.get_empty_cell_count() != 0:
+    if stats.status == "timed_out":
+        print("\nThe search ran out of budget before finishing.\n")
+    elif not stats.solved:
         print("\nCould not solve the puzzle completely. The input could be invalid.\n")
 
     return
 
+def run_parallel(args, solver):
+    from . import parallel
+
+    if args.check_unique:
+        count, report = parallel.parallel_count(solver.cells, limit=2, workers=args.workers, size=args.size)
+        if count == 0:
+            print("\nThe puzzle has no solution.")
+        elif count == 1:
+            print("\nThe puzzle has a unique solution.")
+        else:
+            print("\nThe puzzle has more than one solution.")
+    else:
+        solution, report = parallel.parallel_solve(solver.cells, workers=args.workers, size=args.size)
+        if solution is None:
+            print("\nCould not solve the puzzle completely. The input could be invalid.")
+        else:
+            solver.load_board(solution)
+            print("\n=== Complete Board ==")
+            solver.display_board()
+
+    print("\nWork per worker process:")
+    for pid, work in sorted(report.items()):
+        print(f"  {pid}: {work['subproblems']} subproblems, {work['nodes']} nodes")
+
+def run_batch(args):
+    from . import batch
+
+    if not os.path.isfile(args.batch):
+        print(f"Error: Can't find the file '{args.batch}'.")
+        exit(1)
+
+    errors = []
+    if args.check_unique:
+        total, tally, elapsed = batch.check_file(args.batch, args.output, args.strategy, args.workers, size=args.size,
+                                                 errors=errors)
+        print_errors(errors)
+        rate = total / elapsed if elapsed > 0 else 0.0
+        print(f"Checked {total} puzzles in {elapsed:.2f}s ({rate:.1f} puzzles/sec): "
+              f"{tally['unique']} unique, {tally['multiple']} multiple, {tally['invalid']} invalid.")
+        print(f"Results written to '{args.output}'.")
+        return
+
+    total, tally, elapsed = batch.solve_file(args.batch, args.output, args.strategy, args.workers,
+                                             size=args.size, cache_path=args.cache, errors=errors)
+    print_errors(errors)
+    unsolved = tally["unsolved"]
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"Solved {total - unsolved - tally['invalid']}/{total} puzzles in {elapsed:.2f}s ({rate:.1f} puzzles/sec).")
+    if args.cache:
+        print(f"{tally['cached']} puzzles were answered from the cache.")
+    print(f"Solutions written to '{args.output}'.")
+    if unsolved:
+        print(f"{unsolved} puzzles could not be solved completely. The input could be invalid.")
+    if tally["invalid"]:
+        print(f"{tally['invalid']} lines were not valid puzzles and were written as '{batch.INVALID}'.")
+
+# Print the first few errors of a batch run, one per line.
+def print_errors(errors, limit=10):
+    for error in errors[:limit]:
+        print(f"Error: {error}")
+    if len(errors) > limit:
+        print(f"... and {len(errors) - limit} more.")
+
+def run_images(args):
+    from . import image_batch, image_process
+
+    paths = image_batch.find_images(args.images)
+    if not paths:
+        print(f"Error: No images found at '{args.images}'.")
+        exit(1)
+
+    model_path = image_process.download_model(args.model, args.offline)
+    if model_path is None:
+        print("Could not download or find the model. Exiting.")
+        return
+
+    result = image_batch.process_images(paths, args.output, args.strategy, args.workers, model_path,
+                                         profile=args.profile)
+    if result is None:
+        return
+    total, tally, elapsed = result
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"Read {total} images in {elapsed:.2f}s ({rate:.1f} images/sec): {tally['solved']} solved, "
+          f"{tally['unsolved']} unsolved, {tally['no_grid']} without a grid.")
+    print(f"Results written to '{args.output}'.")
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
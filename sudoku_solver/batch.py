@@ -0,0 +1,161 @@
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .cache import SolutionCache
+from .solver import SudokuSolver
+
+# Set in each worker process by _init_cache when solving with a cache.
+_cache = None
+
+# Written in place of the result of a line that is not a valid puzzle.
+INVALID = "invalid"
+
+def available_cpus():
+    """
+        Number of cores this process is allowed to run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def ordered_map(pool, fn, tasks, workers):
+    """
+        Lazily run fn over an iterable of tasks in an executor and yield the
+        results in task order. A couple of tasks per worker are kept queued,
+        without taking tasks from the iterable any further ahead.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, task))
+        if len(pending) >= workers * 2:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _init_cache(path, size):
+    global _cache
+    _cache = SolutionCache(path=path, size=size)
+
+def _solve_chunk(task):
+    """
+        Worker entry point. Solve a chunk of puzzle lines and return the solved
+        lines along with the number of puzzles left incomplete, the number of
+        lines that could not be read and, with a cache, how many were found in
+        it. Unreadable lines are written as INVALID and their errors returned.
+    """
+    strategy, size, first_line, lines = task
+    solver = SudokuSolver(strategy, size=size, cache=_cache)
+    if _cache is not None:
+        hits = _cache.hits + _cache.disk_hits
+    results = []
+    errors = []
+    unsolved = 0
+    for offset, line in enumerate(lines):
+        try:
+            solver.load_board(line.strip())
+        except ValueError as e:
+            errors.append(f"Line {first_line + offset}: {e}")
+            results.append(INVALID)
+            continue
+        if not solver.solve().solved:
+            unsolved += 1
+        results.append(solver.to_string())
+    tally = Counter(unsolved=unsolved, invalid=len(errors))
+    if _cache is not None:
+        tally["cached"] = _cache.hits + _cache.disk_hits - hits
+    return results, tally, errors
+
+# Result written by check_file for each solution count (capped at 2).
+UNIQUENESS = {0: "invalid", 1: "unique", 2: "multiple"}
+
+def _check_chunk(task):
+    """
+        Worker entry point. Classify each puzzle of a chunk by its number of
+        solutions and return the labels along with how often each occurred.
+        Unreadable lines are labelled INVALID and their errors returned.
+    """
+    strategy, size, first_line, lines = task
+    solver = SudokuSolver(strategy, size=size)
+    results = []
+    errors = []
+    for offset, line in enumerate(lines):
+        try:
+            solver.load_board(line.strip())
+        except ValueError as e:
+            errors.append(f"Line {first_line + offset}: {e}")
+            results.append(INVALID)
+            continue
+        results.append(UNIQUENESS[solver.count_solutions(limit=2)])
+    return results, Counter(results), errors
+
+def _read_chunks(input_file, chunk_size):
+    """
+        Lazily split a puzzle file into chunks of lines, tagged with the line
+        number of their first entry. Blank lines are kept (and written as
+        INVALID) so that output line N always belongs to input line N.
+    """
+    first_line = 1
+    while True:
+        chunk = list(islice(input_file, chunk_size))
+        if not chunk:
+            return
+        yield first_line, chunk
+        first_line += len(chunk)
+
+def solve_file(input_path, output_path, strategy=None, workers=None, chunk_size=1000, size=9, cache_path=None,
+               errors=None):
+    """
+        Solve every puzzle in a one-puzzle-per-line file and write the solutions,
+        in input order, to output_path. The input is streamed and only a bounded
+        number of chunks is in flight at once. With a cache_path, each worker
+        keeps a SolutionCache backed by that sqlite file. Lines that are not a
+        valid puzzle are written as INVALID and, with an `errors` list, their
+        "Line N: ..." messages are appended to it.
+
+        Return a tuple of (puzzles read, Counter of "unsolved" puzzles left
+        incomplete, "invalid" lines and "cached" puzzles answered from the cache,
+        elapsed seconds).
+    """
+    initializer = (_init_cache, (cache_path, size)) if cache_path else None
+    return _run(_solve_chunk, input_path, output_path, strategy, workers, chunk_size, size, initializer, errors)
+
+def check_file(input_path, output_path, strategy=None, workers=None, chunk_size=1000, size=9, errors=None):
+    """
+        Check every puzzle in a one-puzzle-per-line file for uniqueness and write
+        "unique", "multiple" or "invalid" (no solution or not a valid puzzle) per
+        line, in input order. Read errors are collected as in solve_file.
+
+        Return a tuple of (puzzles checked, Counter of labels, elapsed seconds).
+    """
+    return _run(_check_chunk, input_path, output_path, strategy, workers, chunk_size, size, errors=errors)
+
+def _run(worker, input_path, output_path, strategy, workers, chunk_size, size, initializer=None, errors=None):
+    """
+        Stream the input through a process pool, keeping only a bounded number of
+        chunks in flight, and write each chunk's result lines in input order.
+    """
+    workers = workers or available_cpus()
+    total = 0
+    tally = Counter()
+    start = time.perf_counter()
+
+    initializer, initargs = initializer or (None, ())
+    with open(input_path, "r") as rFile, open(output_path, "w") as wFile, \
+            ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        tasks = ((strategy, size, first_line, lines) for first_line, lines in _read_chunks(rFile, chunk_size))
+        for result in ordered_map(pool, worker, tasks, workers):
+            total += _write_results(result, wFile, tally, errors)
+
+    return total, tally, time.perf_counter() - start
+
+def _write_results(result, wFile, tally, errors):
+    results, chunk_tally, chunk_errors = result
+    wFile.write('\n'.join(results))
+    wFile.write('\n')
+    tally.update(chunk_tally)
+    if errors is not None:
+        errors.extend(chunk_errors)
+    return len(results)
@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import platform
+import random
+import time
+
+from .generator import GRADES, generate_puzzle, random_grid
+from .solver import STRATEGIES, DancingLinks, SudokuSolver
+
+# Difficulty groups of 9x9 puzzles, each holding puzzles the generator grades at
+# that difficulty.
+DIFFICULTIES = GRADES
+
+# Groups of larger boards: board size, cells blanked at random from a complete
+# grid, and the strategies that solve them in practical time (the others are
+# skipped). Proving a 25x25 puzzle unique takes too long to dig one, so these
+# puzzles may have several solutions.
+LARGE_GROUPS = {
+    "25x25": (25, 280, ("propagate", "dlx")),
+}
+
+def generate_corpus(directory, count, seed):
+    """
+        Write `count` puzzles per difficulty and per large group to
+        <directory>/<group>.txt in the one-line format. The same seed always
+        produces the same corpus.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    dlx = DancingLinks()
+    grader = SudokuSolver("propagate")
+    for difficulty in DIFFICULTIES:
+        with open(os.path.join(directory, f"{difficulty}.txt"), "w") as wFile:
+            for _ in range(count):
+                cells, _ = generate_puzzle(rng, difficulty, dlx=dlx, solver=grader)
+                wFile.write(''.join(str(number) for number in cells))
+                wFile.write("\n")
+
+    for group, (size, blanks, _) in LARGE_GROUPS.items():
+        solver = SudokuSolver(size=size)
+        large_dlx = DancingLinks(size=size)
+        with open(os.path.join(directory, f"{group}.txt"), "w") as wFile:
+            for _ in range(count):
+                cells = random_grid(rng, size, large_dlx)
+                for cell in rng.sample(range(len(cells)), blanks):
+                    cells[cell] = 0
+                solver.load_board(cells)
+                wFile.write(solver.to_string())
+                wFile.write("\n")
+
+def _percentile(values, percent):
+    """
+        Nearest-rank percentile of an already sorted list.
+    """
+    index = max(0, min(len(values) - 1, -(-len(values) * percent // 100) - 1))
+    return values[index]
+
+def run_benchmark(directory, strategies):
+    """
+        Solve every puzzle of the corpus with each strategy and return the
+        statistics per strategy and group. Large groups are only solved with
+        the strategies listed for them.
+    """
+    results = {}
+    for strategy in strategies:
+        results[strategy] = {}
+        groups = [(difficulty, 9) for difficulty in DIFFICULTIES]
+        groups += [(group, size) for group, (size, _, suited) in LARGE_GROUPS.items() if strategy in suited]
+
+        solvers = {}
+        for group, size in groups:
+            if size not in solvers:
+                solvers[size] = SudokuSolver(strategy, size=size)
+                # warm up once so lazily built state (e.g. the DLX matrix) is not timed
+                solvers[size].load_board(bytes(size * size))
+                solvers[size].solve()
+            results[strategy][group] = _run_group(solvers[size], os.path.join(directory, f"{group}.txt"))
+    return results
+
+def _run_group(solver, path):
+    """
+        Solve every puzzle of one corpus file and return its statistics.
+    """
+    with open(path, "r") as rFile:
+        puzzles = [l.strip() for l in rFile if l.strip()]
+
+    times = []
+    nodes = []
+    solved = 0
+    for puzzle in puzzles:
+        start = time.perf_counter()
+        solver.load_board(puzzle)
+        stats = solver.solve()
+        times.append(time.perf_counter() - start)
+        nodes.append(solver.nodes)
+        if stats.solved:
+            solved += 1
+
+    times.sort()
+    total = sum(times)
+    return {
+        "puzzles": len(puzzles),
+        "solved": solved,
+        "mean_ms": 1000 * total / len(times),
+        "p50_ms": 1000 * _percentile(times, 50),
+        "p99_ms": 1000 * _percentile(times, 99),
+        "max_ms": 1000 * times[-1],
+        "mean_nodes": sum(nodes) / len(nodes),
+        "max_nodes": max(nodes),
+        "puzzles_per_sec": len(times) / total if total > 0 else 0.0,
+    }
+
+def run_image_benchmark(labels_path, profiles, model_path, repeat=3):
+    """
+        Read every labelled sample image with each preprocessing profile and
+        return, per profile, the share of cells and boards read correctly and
+        the latency of the image pipeline (decoding to recognized digits).
+
+        Each line of the labels file is "<image file> <81-character puzzle>",
+        with image paths relative to the labels file.
+    """
+    from . import image_process
+
+    recognizer = image_process.load_recognizer(model_path)
+    if recognizer is None:
+        return None
+    directory = os.path.dirname(labels_path)
+    with open(labels_path, "r") as rFile:
+        samples = [l.split() for l in rFile if l.strip()]
+
+    results = {}
+    for profile in profiles:
+        times = []
+        cells_correct = 0
+        boards_correct = 0
+        fallbacks = 0
+        for name, expected in samples:
+            path = os.path.join(directory, name)
+            for _ in range(repeat):
+                start = time.perf_counter()
+                prepared = image_process.prepare_cells(path, profile=profile)
+                board = [0] * 81
+                if prepared is not None:
+                    filled, rois, used = prepared
+                    if len(rois):
+                        for cell, digit in zip(filled, recognizer.recognize(rois)):
+                            board[cell] = int(digit)
+                times.append(time.perf_counter() - start)
+
+            read = ''.join(str(number) for number in board)
+            matches = sum(a == b for a, b in zip(read, expected))
+            cells_correct += matches
+            boards_correct += matches == 81
+            fallbacks += prepared is not None and used != profile
+
+        times.sort()
+        results[profile] = {
+            "images": len(samples),
+            "boards_correct": boards_correct,
+            "cell_accuracy": cells_correct / (81 * len(samples)),
+            "fallbacks": fallbacks,
+            "mean_ms": 1000 * sum(times) / len(times),
+            "p50_ms": 1000 * _percentile(times, 50),
+            "max_ms": 1000 * times[-1],
+        }
+    return results
+
+def compare(results, baseline, threshold):
+    """
+        Return (strategy, difficulty, ratio) for every group whose mean solve time
+        grew by more than `threshold` times compared to the baseline results.
+    """
+    slowdowns = []
+    for strategy, groups in results.items():
+        for difficulty, stats in groups.items():
+            previous = baseline.get(strategy, {}).get(difficulty)
+            if not previous or previous["mean_ms"] <= 0:
+                continue
+            ratio = stats["mean_ms"] / previous["mean_ms"]
+            if ratio > threshold:
+                slowdowns.append((strategy, difficulty, ratio))
+    return slowdowns
+
+def print_results(results):
+    print(f"{'strategy':<10} {'difficulty':<10} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'nodes':>9} {'puzzles/s':>10}")
+    for strategy, groups in results.items():
+        for difficulty, stats in groups.items():
+            print(f"{strategy:<10} {difficulty:<10} {stats['mean_ms']:>9.3f} {stats['p50_ms']:>9.3f} "
+                  f"{stats['p99_ms']:>9.3f} {stats['max_ms']:>9.3f} {stats['mean_nodes']:>9.1f} "
+                  f"{stats['puzzles_per_sec']:>10.1f}")
+
+def print_image_results(results):
+    print(f"{'profile':<10} {'images':>7} {'boards ok':>10} {'cell acc':>9} {'fallbacks':>10} {'mean ms':>9} {'p50 ms':>9} {'max ms':>9}")
+    for profile, stats in results.items():
+        print(f"{profile:<10} {stats['images']:>7} {stats['boards_correct']:>10} {stats['cell_accuracy']:>9.3f} "
+              f"{stats['fallbacks']:>10} {stats['mean_ms']:>9.3f} {stats['p50_ms']:>9.3f} {stats['max_ms']:>9.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solving strategies.")
+    parser.add_argument("--corpus", default="bench_corpus", help="Directory of the puzzle corpus. Generated if missing.")
+    parser.add_argument("-n", "--count", type=int, default=50, help="Puzzles per difficulty when generating the corpus.")
+    parser.add_argument("--seed", type=int, default=2024, help="Seed for the corpus generator.")
+    parser.add_argument("--regenerate", action="store_true", help="Regenerate the corpus even if it exists.")
+    parser.add_argument("-s", "--strategies", nargs="+", default=list(STRATEGIES), choices=STRATEGIES, help="Strategies to benchmark.")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--baseline", help="Previous JSON results to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Flag groups whose mean time grows by more than this factor.")
+    parser.add_argument("--images", nargs="?", const="samples/image_labels.txt", help="Also benchmark the image preprocessing profiles on labelled sample images (defaults to samples/image_labels.txt).")
+    parser.add_argument("-m", "--model", default="mnist.onnx", help="Path to the ONNX model file for --images.")
+    args = parser.parse_args()
+
+    missing = any(not os.path.isfile(os.path.join(args.corpus, f"{group}.txt"))
+                  for group in list(DIFFICULTIES) + list(LARGE_GROUPS))
+    if args.regenerate or missing:
+        print(f"Generating corpus in '{args.corpus}' ({args.count} puzzles per difficulty, seed {args.seed})...")
+        generate_corpus(args.corpus, args.count, args.seed)
+
+    results = run_benchmark(args.corpus, args.strategies)
+    print_results(results)
+
+    image_results = None
+    if args.images:
+        from .image_process import PROFILES
+        image_results = run_image_benchmark(args.images, list(PROFILES), args.model)
+        if image_results is not None:
+            print()
+            print_image_results(image_results)
+
+    with open(args.output, "w") as wFile:
+        json.dump({
+            "corpus": args.corpus,
+            "python": platform.python_version(),
+            "timestamp": time.time(),
+            "results": results,
+            "image_results": image_results,
+        }, wFile, indent=2)
+    print(f"\nResults written to '{args.output}'.")
+
+    if args.baseline:
+        with open(args.baseline, "r") as rFile:
+            baseline = json.load(rFile)["results"]
+        slowdowns = compare(results, baseline, args.threshold)
+        for strategy, difficulty, ratio in slowdowns:
+            print(f"SLOWDOWN: {strategy}/{difficulty} mean time is {ratio:.2f}x the baseline.")
+        if slowdowns:
+            exit(1)
+        print("No slowdowns compared to the baseline.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+import sqlite3
+from collections import OrderedDict
+from itertools import islice, permutations, product
+
+from .tables import geometry
+
+# Rounds of colour refinement used to tell rows and columns apart.
+REFINE_ROUNDS = 3
+
+# Most row/column orderings tried when refinement leaves ties. Boards with more
+# symmetry than this get a key that some of their variants will not share,
+# which only costs cache hits.
+MAX_ARRANGEMENTS = 256
+
+def _rank(signatures):
+    """
+        Replace each signature by its rank among the distinct signatures.
+    """
+    ranks = {signature: rank for rank, signature in enumerate(sorted(set(signatures)))}
+    return [ranks[signature] for signature in signatures]
+
+def _refine(cells, size):
+    """
+        Colour rows and columns by their structure, independently of the digit
+        labels and of the order of rows and columns. Each round, a row is told
+        apart by the colours of the columns its givens sit in and the colours of
+        the digits there, and the other way round for columns.
+    """
+    rows = [0] * size
+    cols = [0] * size
+    counts = {}
+    for number in cells:
+        if number:
+            counts[number] = counts.get(number, 0) + 1
+    digits = dict(counts)
+
+    for _ in range(REFINE_ROUNDS):
+        row_signatures = []
+        col_signatures = []
+        for n in range(size):
+            row_signatures.append((rows[n], tuple(sorted(
+                (cols[c], digits[cells[n * size + c]]) for c in range(size) if cells[n * size + c]))))
+            col_signatures.append((cols[n], tuple(sorted(
+                (rows[r], digits[cells[r * size + n]]) for r in range(size) if cells[r * size + n]))))
+
+        places = {number: ([], []) for number in digits}
+        for i, number in enumerate(cells):
+            if number:
+                places[number][0].append(rows[i // size])
+                places[number][1].append(cols[i % size])
+        # the two halves are sorted so a transposed board gets the same colours
+        digit_signatures = {number: (digits[number],) + tuple(sorted((tuple(sorted(in_rows)), tuple(sorted(in_cols)))))
+                            for number, (in_rows, in_cols) in places.items()}
+
+        ranks = _rank(row_signatures + col_signatures)
+        rows, cols = ranks[:size], ranks[size:]
+        numbers = list(digit_signatures)
+        digits = dict(zip(numbers, _rank([digit_signatures[number] for number in numbers])))
+    return rows, cols
+
+def _tied_orders(items, colours):
+    """
+        Sort items by colour and yield every ordering that only permutes items of
+        equal colour.
+    """
+    items = sorted(items, key=colours.__getitem__)
+    groups = []
+    for item in items:
+        if groups and colours[groups[-1][0]] == colours[item]:
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+    for choice in product(*[permutations(group) for group in groups]):
+        yield [item for group in choice for item in group]
+
+def _line_orders(colours, box):
+    """
+        Yield the orderings of the rows (or columns) that sort the bands (or
+        stacks) and the lines within each of them by colour.
+    """
+    bands = [list(range(b * box, (b + 1) * box)) for b in range(box)]
+    band_colours = [tuple(sorted(colours[line] for line in band)) for band in bands]
+    for band_order in _tied_orders(range(box), band_colours):
+        for choice in product(*[_tied_orders(bands[band], colours) for band in band_order]):
+            yield [line for lines in choice for line in lines]
+
+def canonical_form(cells, size=9):
+    """
+        Map a board to a canonical key shared by its symmetric variants: digit
+        relabelings, permutations of bands, stacks and the lines within them,
+        and transposition.
+
+        Return (key, positions, relabel) where key[i] is relabel[cells[positions[i]]]
+        as bytes; relabel is a translation table covering every digit.
+    """
+    g = geometry(size)
+    cells = bytes(cells)
+    rows, cols = _refine(cells, size)
+
+    best = None
+    for transposed in (False, True):
+        row_colours, col_colours = (cols, rows) if transposed else (rows, cols)
+        arrangements = product(list(islice(_line_orders(row_colours, g.box), MAX_ARRANGEMENTS)),
+                               list(islice(_line_orders(col_colours, g.box), MAX_ARRANGEMENTS)))
+        for row_order, col_order in islice(arrangements, MAX_ARRANGEMENTS):
+            if transposed:
+                positions = [c * size + r for r in row_order for c in col_order]
+            else:
+                positions = [r * size + c for r in row_order for c in col_order]
+
+            # number the digits in order of first appearance
+            relabel = bytearray(size + 1)
+            key = bytearray(g.cells)
+            label = 0
+            for i, position in enumerate(positions):
+                number = cells[position]
+                if number:
+                    if not relabel[number]:
+                        label += 1
+                        relabel[number] = label
+                    key[i] = relabel[number]
+            if best is None or key < best[0]:
+                best = (key, positions, relabel)
+
+    key, positions, relabel = best
+    # digits missing from the board are interchangeable, so any numbering works
+    label = max(relabel)
+    for number in range(1, size + 1):
+        if not relabel[number]:
+            label += 1
+            relabel[number] = label
+    return bytes(key), positions, bytes(relabel) + bytes(range(size + 1, 256))
+
+class SolutionCache():
+    """
+        Solutions keyed by the canonical form of their puzzle, so symmetric
+        variants of a puzzle share one entry. The most recently used `capacity`
+        entries are kept in memory; with a `path`, every solution is also stored
+        in an sqlite database that survives restarts.
+
+        `hits` counts lookups answered from memory, `disk_hits` those answered
+        from the database and `misses` the rest.
+    """
+    def __init__(self, capacity=10000, path=None, size=9):
+        self.capacity = capacity
+        self.path = path
+        self.size = size
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS solutions (key BLOB PRIMARY KEY, solution BLOB NOT NULL)")
+            self._db.commit()
+
+    def lookup(self, cells):
+        """
+            Return (solution, form): the cached solution of a board as bytes, in
+            the board's own orientation and digits, or None, and the board's
+            canonical form, which store() takes so a miss computes it only once.
+        """
+        form = canonical_form(cells, self.size)
+        key, positions, relabel = form
+        solution = self._memory.get(key)
+        if solution is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+        elif self._db is not None:
+            row = self._db.execute("SELECT solution FROM solutions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                solution = bytes(row[0])
+                self._remember(key, solution)
+                self.disk_hits += 1
+        if solution is None:
+            self.misses += 1
+            return None, form
+
+        solution = solution.translate(bytes.maketrans(relabel[:self.size + 1], bytes(range(self.size + 1))))
+        cells = bytearray(len(solution))
+        for i, position in enumerate(positions):
+            cells[position] = solution[i]
+        return bytes(cells), form
+
+    def store(self, form, solution):
+        """
+            Cache the solution (size * size cells) of a board given by its
+            canonical form, as returned by lookup() or canonical_form().
+        """
+        key, positions, relabel = form
+        solution = bytes(solution[position] for position in positions).translate(relabel)
+        self._remember(key, solution)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?)", (key, solution))
+            self._db.commit()
+
+    def _remember(self, key, solution):
+        self._memory[key] = solution
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self._memory),
+        }
@@ -0,0 +1,164 @@
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch import available_cpus, ordered_map
+from .solver import DancingLinks, SudokuSolver
+from .tables import SIZES, geometry
+
+# Difficulty grades, easiest first. A puzzle is graded by the hardest thing the
+# propagate strategy needed to solve it: the techniques listed here, or search.
+GRADES = ("easy", "medium", "hard", "evil")
+
+GRADE_TECHNIQUES = {
+    "medium": ("pointing", "box_line"),
+    "hard": ("naked_pair", "hidden_pair", "naked_triple", "hidden_triple"),
+}
+
+def random_grid(rng, size=9, dlx=None):
+    """
+        Build a random complete grid. The boxes on the diagonal share no row or
+        column, so they are filled with independently shuffled digits and the
+        rest of the grid is completed with dancing links. The rows within bands,
+        bands, columns within stacks and stacks are then shuffled as well.
+    """
+    g = geometry(size)
+    dlx = dlx or DancingLinks(size=size)
+    box = g.box
+    solution = None
+    while solution is None: # small boards can be filled into a dead end
+        cells = [0] * g.cells
+        for b in range(box):
+            digits = rng.sample(range(1, size + 1), size)
+            for cell, digit in zip(g.units[2 * size + b * box + b], digits):
+                cells[cell] = digit
+        dlx.load(cells)
+        solution = next(dlx.iter_solutions(), None)
+
+    def shuffled_lines():
+        groups = rng.sample(range(box), box)
+        return [group * box + line for group in groups for line in rng.sample(range(box), box)]
+
+    rows = shuffled_lines()
+    cols = shuffled_lines()
+    return [solution[r][c] for r in rows for c in cols]
+
+def dig(rng, dlx, cells, givens=0, accept=None):
+    """
+        Remove cells from a complete grid in random order, keeping only removals
+        that leave exactly one solution (and that `accept(cells)` approves, if
+        given), until `givens` cells remain or none can go. `cells` is changed in
+        place and returned.
+    """
+    remaining = len(cells)
+    for cell in rng.sample(range(len(cells)), len(cells)):
+        if remaining <= givens:
+            break
+        number = cells[cell]
+        cells[cell] = 0
+        dlx.load(cells)
+        if dlx.count_solutions(limit=2) == 1 and (accept is None or accept(cells)):
+            remaining -= 1
+        else:
+            cells[cell] = number
+    return cells
+
+def grade(board, size=9, solver=None):
+    """
+        Solve a board with the propagate strategy and return its grade along with
+        the SolveStats: "evil" if it needed search, otherwise the grade of the
+        hardest technique that made progress.
+    """
+    if solver is None:
+        solver = SudokuSolver("propagate", size=size)
+    solver.load_board(board)
+    stats = solver.solve()
+    if stats.nodes:
+        return "evil", stats
+    for name in ("hard", "medium"):
+        if any(stats.technique_hits[technique] for technique in GRADE_TECHNIQUES[name]):
+            return name, stats
+    return "easy", stats
+
+def generate_puzzle(rng, difficulty=None, size=9, attempts=100, dlx=None, solver=None):
+    """
+        Generate one puzzle with a unique solution. With a difficulty, removals
+        that would grade the puzzle any harder are skipped and puzzles are
+        generated until one grades at it, raising ValueError after `attempts`
+        tries. Return (puzzle as a list of cells, grade).
+    """
+    if difficulty is not None and difficulty not in GRADES:
+        raise ValueError(f"Unknown difficulty '{difficulty}'. Choose from: {', '.join(GRADES)}.")
+    dlx = dlx or DancingLinks(size=size)
+    solver = solver or SudokuSolver("propagate", size=size)
+    accept = None
+    if difficulty is not None and difficulty != GRADES[-1]:
+        hardest = GRADES.index(difficulty)
+        accept = lambda cells: GRADES.index(grade(cells, size, solver)[0]) <= hardest
+
+    for _ in range(attempts):
+        cells = dig(rng, dlx, random_grid(rng, size, dlx), accept=accept)
+        puzzle_grade, _ = grade(cells, size, solver)
+        if difficulty is None or puzzle_grade == difficulty:
+            return cells, puzzle_grade
+    raise ValueError(f"Could not generate a {difficulty} puzzle in {attempts} attempts.")
+
+def _generate_chunk(task):
+    """
+        Worker entry point. Generate the puzzles numbered first..first + count - 1,
+        each from its own seed so the output does not depend on the worker count.
+    """
+    seed, size, difficulty, first, count = task
+    dlx = DancingLinks(size=size)
+    solver = SudokuSolver("propagate", size=size)
+    results = []
+    for index in range(first, first + count):
+        rng = random.Random(f"{seed}:{index}")
+        cells, puzzle_grade = generate_puzzle(rng, difficulty, size, dlx=dlx, solver=solver)
+        solver.load_board(cells)
+        results.append((solver.to_string(), puzzle_grade))
+    return results
+
+def iter_generate(count, difficulty=None, seed=0, size=9, workers=None, chunk_size=10):
+    """
+        Lazily generate `count` puzzles across a process pool and yield them in
+        order as (one-line puzzle, grade). The same seed always produces the same
+        puzzles, whatever the number of workers.
+    """
+    workers = workers or available_cpus()
+    tasks = ((seed, size, difficulty, first, min(chunk_size, count - first)) for first in range(0, count, chunk_size))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in ordered_map(pool, _generate_chunk, tasks, workers):
+            yield from results
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Sudoku puzzles with a unique solution.")
+    parser.add_argument("-n", "--count", type=int, default=10, help="Number of puzzles to generate.")
+    parser.add_argument("-d", "--difficulty", choices=GRADES, help="Only keep puzzles of this grade.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the generator.")
+    parser.add_argument("--size", type=int, default=9, choices=SIZES, help="Board size (rows per board).")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes. Defaults to the available cores.")
+    parser.add_argument("-o", "--output", help="Where to write the puzzles, one per line. Defaults to stdout.")
+    args = parser.parse_args()
+
+    tally = Counter()
+    start = time.perf_counter()
+    wFile = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for puzzle, puzzle_grade in iter_generate(args.count, args.difficulty, args.seed, args.size, args.workers):
+            wFile.write(puzzle)
+            wFile.write("\n")
+            tally[puzzle_grade] += 1
+    finally:
+        if args.output:
+            wFile.close()
+
+    elapsed = time.perf_counter() - start
+    grades = ", ".join(f"{tally[name]} {name}" for name in GRADES if tally[name])
+    print(f"Generated {args.count} puzzles in {elapsed:.2f}s ({grades}).", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
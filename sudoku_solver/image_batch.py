@@ -0,0 +1,115 @@
+import csv
+import glob
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import image_process
+from .batch import available_cpus, ordered_map
+from .solver import SudokuSolver
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+# Stages timed for every image, in pipeline order. The first four run in the
+# worker processes, recognition and solving in the main process.
+STAGES = ("preprocess", "grid", "warp", "cells", "recognize", "solve")
+
+def find_images(source):
+    """
+        Return the image files of a directory, or the files matching a glob
+        pattern, in sorted order.
+    """
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if name.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+
+def _prepare_chunk(task):
+    """
+        Worker entry point. Decode a chunk of images, locate their grids and cut
+        out the cells, returning (path, prepared cells or None, stage timings).
+    """
+    paths, profile = task
+    results = []
+    for path in paths:
+        timings = {}
+        prepared = image_process.prepare_cells(path, timings, profile)
+        results.append((path, prepared, timings))
+    return results
+
+def process_images(paths, output_path, strategy=None, workers=None, model_path="mnist.onnx", chunk_size=8,
+                   profile="robust"):
+    """
+        Read and solve a list of puzzle images. Images are preprocessed across a
+        process pool with the given preprocessing profile, falling back to
+        "robust" for images whose grid it misses. The cells of each chunk of
+        images are recognized together in one forward pass and the boards are
+        solved in the main process. One CSV row per image, in input order, is
+        written to output_path with the profile used, the puzzle, the solution and
+        the milliseconds spent in each of STAGES. A chunk's forward pass is split
+        evenly across its images.
+
+        Return a tuple of (images read, Counter of "solved", "unsolved" and
+        "no_grid" images, elapsed seconds), or None if the model cannot be loaded.
+    """
+    recognizer = image_process.load_recognizer(model_path)
+    if recognizer is None:
+        return None
+    workers = workers or available_cpus()
+    solver = SudokuSolver(strategy)
+    tally = Counter()
+    start = time.perf_counter()
+
+    with open(output_path, "w", newline="") as wFile, ProcessPoolExecutor(max_workers=workers) as pool:
+        writer = csv.writer(wFile)
+        writer.writerow(["image", "status", "profile", "puzzle", "solution"] + [f"{stage}_ms" for stage in STAGES])
+        tasks = ((paths[first:first + chunk_size], profile) for first in range(0, len(paths), chunk_size))
+        for results in ordered_map(pool, _prepare_chunk, tasks, workers):
+            _solve_chunk(results, recognizer, solver, writer, tally)
+
+    return len(paths), tally, time.perf_counter() - start
+
+def _solve_chunk(results, recognizer, solver, writer, tally):
+    """
+        Recognize the cells of all the prepared images of a chunk in one forward
+        pass, then solve each board and write its row.
+    """
+    prepared = [cells for _, cells, _ in results if cells is not None]
+    digits = []
+    seconds = 0.0
+    if prepared:
+        recognize_start = time.perf_counter()
+        rois = np.concatenate([rois for _, rois, _ in prepared])
+        if len(rois):
+            digits = recognizer.recognize(rois)
+        seconds = (time.perf_counter() - recognize_start) / len(prepared)
+
+    offset = 0
+    for path, cells, timings in results:
+        if cells is None:
+            tally["no_grid"] += 1
+            writer.writerow([path, "no_grid", "", "", ""] + [_ms(timings, stage) for stage in STAGES])
+            continue
+
+        filled, rois, used = cells
+        board = np.zeros(81, dtype=int)
+        board[filled] = digits[offset:offset + len(rois)]
+        offset += len(rois)
+        timings["recognize"] = seconds
+
+        solver.load_board(board)
+        puzzle = solver.to_string()
+        stats = solver.solve()
+        timings["solve"] = stats.total_time
+        status = "solved" if stats.solved else "unsolved"
+        tally[status] += 1
+        writer.writerow([path, status, used, puzzle, solver.to_string() if stats.solved else ""]
+                        + [_ms(timings, stage) for stage in STAGES])
+
+def _ms(timings, stage):
+    if stage not in timings:
+        return ""
+    return f"{timings[stage] * 1000:.3f}"
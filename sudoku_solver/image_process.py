@@ -1,13 +1,17 @@
 import os
+import time
 import urllib.request
 
 import cv2
 import numpy as np
 import pytesseract
 
-def download_model(model_file="mnist.onnx"):
-    """Downloads the pre-trained ONNX model if it doesn't exist."""
+def download_model(model_file="mnist.onnx", offline=False):
+    """Downloads the pre-trained ONNX model if it doesn't exist, unless offline."""
     if not os.path.exists(model_file):
+        if offline:
+            print(f"Model file '{model_file}' not found and downloading is disabled.")
+            return None
         print("Downloading pre-trained digit recognition model (mnist.onnx)...")
         # A reliable link to a simple MNIST ONNX model
         url = "https://github.com/onnx/models/raw/refs/heads/main/validated/vision/classification/mnist/model/mnist-12.onnx"
@@ -19,62 +23,143 @@ def download_model(model_file="mnist.onnx"):
             return None
     return model_file
 
-def extract_sudoku_board(image_path, model_path, debug=False):
-    try:
-        net = cv2.dnn.readNetFromONNX(model_path)
-    except Exception as e:
-        print(f"Error loading the ONNX model: {e}")
-        return None
+# Recognizers already loaded in this process, by model path.
+_recognizers = {}
 
-    # 1. Preprocess the image
-    original_img, thresh = preprocess_image(image_path)
-    if original_img is None:
-        return None
-    if debug:
-        _debug_show_img(original_img, "original img")
-        _debug_show_img(thresh, "gray scaled")
+def load_recognizer(model_path, warm_up=True):
+    """Returns the DigitRecognizer for a model file, loading it only the first time."""
+    path = os.path.abspath(model_path)
+    if path not in _recognizers:
+        try:
+            _recognizers[path] = DigitRecognizer(model_path, warm_up)
+        except Exception as e:
+            print(f"Error loading the ONNX model: {e}")
+            return None
+    return _recognizers[path]
 
-    # 2. Find the Sudoku grid
-    grid_contour = find_grid_contour(thresh)
-    if grid_contour is None:
-        print("Could not find a Sudoku grid in the image.")
-        return None
-    
-    cv2.drawContours(original_img, [grid_contour], -1, (0, 255, 0), 2)
-    if debug:
-        _debug_show_img(original_img, "with contour")
+class DigitRecognizer():
+    """
+        Holds a parsed digit recognition network so it can be reused across
+        images, e.g. by a long-running service. Loading the network is the most
+        expensive step of reading one image.
+    """
+    def __init__(self, model_path, warm_up=True):
+        self.model_path = model_path
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        if warm_up:
+            self.warm_up()
 
-    # 3. Apply perspective transform
-    warped_grid, _ = get_perspective_transform(original_img, grid_contour)
-    if debug:
-        _debug_show_img(warped_grid, "warped grid")
+    def warm_up(self):
+        """Runs one forward pass on a blank cell so lazy initialization is not timed later."""
+        self.net.setInput(np.zeros((1, 1, 28, 28), dtype=np.float32))
+        self.net.forward()
 
-    # 4. Extract digits
-    return extract_digits_from_grid(warped_grid, net, debug=debug)
- 
+    def recognize(self, rois):
+        """Classifies a (n, 28, 28) stack of cell images, e.g. from prepare_cells, in one pass."""
+        return recognize_cells(self.net, rois)
 
-def preprocess_image(image_path):
-    """Loads and preprocesses the image for grid detection."""
+    def extract_board(self, image_path, debug=False, profile="robust"):
+        """Reads the board in an image (a path or encoded bytes) as a 9x9 array, or None if no grid is found."""
+        # 1. Preprocess the image and 2. find the Sudoku grid, falling back to the robust profile
+        img = load_image(image_path)
+        if img is None:
+            return None
+        original_img, grid_contour, used = locate_grid(img, profile)
+        if debug:
+            print(f"Preprocessing profile: {used}")
+            _debug_show_img(original_img, "original img")
+        if grid_contour is None:
+            print("Could not find a Sudoku grid in the image.")
+            return None
+
+        cv2.drawContours(original_img, [grid_contour], -1, (0, 255, 0), 2)
+        if debug:
+            _debug_show_img(original_img, "with contour")
+
+        # 3. Apply perspective transform
+        warped_grid, _ = get_perspective_transform(original_img, grid_contour)
+        if debug:
+            _debug_show_img(warped_grid, "warped grid")
+
+        # 4. Extract digits
+        return extract_digits_from_grid(warped_grid, self.net, debug=debug)
+
+def extract_sudoku_board(image_path, model_path, debug=False, profile="robust"):
+    recognizer = load_recognizer(model_path)
+    if recognizer is None:
+        return None
+    return recognizer.extract_board(image_path, debug, profile)
+
+# Preprocessing profiles. "robust" filters the image with an edge-preserving bilateral filter at
+# 600px width; "fast" uses a Gaussian blur at a smaller working resolution, which is enough for clean scans.
+PROFILES = {
+    "fast": {"width": 450, "blur": "gaussian"},
+    "robust": {"width": 600, "blur": "bilateral"},
+}
+
+def load_image(image_path):
+    """Loads an image from disk, or decodes it if given the encoded bytes. Returns None on failure."""
     try:
+        if isinstance(image_path, (bytes, bytearray)):
+            img = cv2.imdecode(np.frombuffer(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                raise ValueError("Could not decode the image data")
+            return img
         img = cv2.imread(image_path)
         if img is None:
             raise FileNotFoundError(f"Image not found at {image_path}")
     except Exception as e:
         print(f"Error loading image: {e}")
+        return None
+    return img
+
+def preprocess_image(image_path, profile="robust"):
+    """Loads and preprocesses the image for grid detection."""
+    img = load_image(image_path)
+    if img is None:
         return None, None
+    return _apply_profile(img, profile)
+
+def _apply_profile(img, profile):
+    settings = PROFILES[profile]
 
     # Resize for consistent processing
-    scale = 600 / img.shape[1]
+    scale = settings["width"] / img.shape[1]
     img = cv2.resize(img, (int(img.shape[1] * scale), int(img.shape[0] * scale)))
 
-    blurred_color = cv2.bilateralFilter(img, 9, 75, 75)
-    gray = cv2.cvtColor(blurred_color, cv2.COLOR_BGR2GRAY)
+    if settings["blur"] == "bilateral":
+        blurred_color = cv2.bilateralFilter(img, 9, 75, 75)
+        gray = cv2.cvtColor(blurred_color, cv2.COLOR_BGR2GRAY)
+    else:
+        # the cells are thresholded again later, so the color image can stay unfiltered
+        blurred_color = img
+        gray = cv2.GaussianBlur(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), (5, 5), 0)
 
     # Adaptive gaussian thresholing seems to work better for our case, since the board is usually clean.
     # https://docs.opencv.org/3.4/d7/d4d/tutorial_py_thresholding.html
     thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2)
     return blurred_color, thresh
 
+def locate_grid(img, profile="robust", timings=None):
+    """
+        Preprocesses a loaded image with a profile and finds the grid contour, retrying with the
+        robust profile if the grid can't be found. Returns (preprocessed image, contour or None,
+        profile used). The seconds spent are added to `timings` under "preprocess" and "grid".
+    """
+    timings = {} if timings is None else timings
+    profiles = [profile] if profile == "robust" else [profile, "robust"]
+    for name in profiles:
+        start = time.perf_counter()
+        original_img, thresh = _apply_profile(img, name)
+        timings["preprocess"] = timings.get("preprocess", 0.0) + time.perf_counter() - start
+
+        start = time.perf_counter()
+        grid_contour = find_grid_contour(thresh)
+        timings["grid"] = timings.get("grid", 0.0) + time.perf_counter() - start
+        if grid_contour is not None:
+            return original_img, grid_contour, name
+    return original_img, None, name
+
 def find_grid_contour(thresh_image):
     """Finds the largest contour that is likely the Sudoku grid."""
     contours, _ = cv2.findContours(thresh_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -130,10 +215,57 @@ def get_perspective_transform(image, corners):
     warped = cv2.warpPerspective(image, matrix, (max_width, max_height))
     return warped, matrix
 
+def prepare_cells(image_path, timings=None, profile="robust"):
+    """
+        Runs the pipeline up to digit recognition without a model: locates the grid and cuts out
+        the cells. Returns (indices of the non-empty cells, their 28x28 images, profile used) or
+        None. The seconds spent in each stage are added to `timings` under "preprocess" (including
+        decoding), "grid", "warp" and "cells".
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    img = load_image(image_path)
+    timings["preprocess"] = time.perf_counter() - start
+    if img is None:
+        return None
+
+    original_img, grid_contour, used = locate_grid(img, profile, timings)
+    if grid_contour is None:
+        print(f"Could not find a Sudoku grid in '{image_path}'.")
+        return None
+
+    start = time.perf_counter()
+    warped_grid, _ = get_perspective_transform(original_img, grid_contour)
+    timings["warp"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, filled, rois = _cell_rois(warped_grid)
+    timings["cells"] = time.perf_counter() - start
+    return filled, rois, used
+
 def extract_digits_from_grid(warped_grid, model, debug=False):
-    """Extracts each digit from the grid cells using a CNN model."""
+    """Extracts each digit from the grid cells using a CNN model, in one forward pass."""
     board = np.zeros((9, 9), dtype=int)
-    
+    cells, filled, rois = _cell_rois(warped_grid)
+    if len(filled) == 0:
+        return board
+
+    # Get the digit with the highest probability for each cell
+    digits = recognize_cells(model, rois)
+    if debug:
+        for index, digit in zip(filled, digits):
+            print(digit)
+            _debug_show_img(cells[index])
+
+    # Sudoku doesn't use '0', so we can ignore it to filter out noise.
+    board.reshape(81)[filled] = digits
+    return board
+
+def _cell_rois(warped_grid):
+    """
+        Cuts the grid into cells. Returns the grayscale cells as a (81, h, w) array, the indices of
+        the cells that contain a digit and those cells thresholded and resized to (n, 28, 28).
+    """
     # Resize the grid to a fixed size for consistent processing
     fixed_size = 450
     grid_resized = cv2.resize(warped_grid, (fixed_size, fixed_size))
@@ -142,43 +274,54 @@ def extract_digits_from_grid(warped_grid, model, debug=False):
     cell_size = fixed_size // 9
     margin = 5 # Number of pixels to crop from each side of the cell
 
-    for r in range(9):
-        for c in range(9):
-            # Crop the cell from the grid, removing the border via the margin.
-            y1 = r * cell_size + margin
-            y2 = (r + 1) * cell_size - margin
-            x1 = c * cell_size + margin
-            x2 = (c + 1) * cell_size - margin
-            cell_cropped = gray_resized[y1:y2, x1:x2]
-
-            # Apply thresholding to get a binary image of the digit.
-            _, cell_thresh = cv2.threshold(cell_cropped, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
-
-            # Check if the cell contains a digit by looking for non-zero pixels
-            if cv2.countNonZero(cell_thresh) > 20:
-                
-                # Prepare the cell for the deep learning model
-                # The model expects a 28x28 image
-                roi = cv2.resize(cell_thresh, (28, 28))
-                
-                # Create a blob for the DNN model
-                # Normalization (1/255.0) and creating the blob
-                blob = cv2.dnn.blobFromImage(roi, 1.0 / 255.0, (28, 28))
-                
-                # Set the input to the network and perform a forward pass
-                model.setInput(blob)
-                pred = model.forward()
-                
-                # Get the digit with the highest probability
-                digit = np.argmax(pred)
-                if debug:
-                    print(digit)
-                    _debug_show_img(cell_cropped)
-                
-                # Sudoku doesn't use '0', so we can ignore it to filter out noise.
-                if digit != 0:
-                    board[r, c] = digit
-    return board
+    # Slice all 81 cells at once into a (81, h, w) view, removing the border via the margin.
+    cells = gray_resized.reshape(9, cell_size, 9, cell_size).swapaxes(1, 2)
+    cells = cells[:, :, margin:cell_size - margin, margin:cell_size - margin].reshape(81, cell_size - 2 * margin, -1)
+
+    # Binary image of each digit, thresholded per cell like cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU.
+    cells_thresh = np.where(cells > _otsu_thresholds(cells)[:, None, None], 0, 255).astype(np.uint8)
+
+    # Check which cells contain a digit by looking for non-zero pixels
+    filled = np.flatnonzero(np.count_nonzero(cells_thresh, axis=(1, 2)) > 20)
+    if len(filled) == 0:
+        return cells, filled, np.zeros((0, 28, 28), dtype=np.uint8)
+
+    # The model expects 28x28 images. cv2.resize treats the stacked cells as channels,
+    # so they are all resized in one call.
+    rois = cv2.resize(np.ascontiguousarray(cells_thresh[filled].transpose(1, 2, 0)), (28, 28))
+    rois = rois.reshape(28, 28, -1).transpose(2, 0, 1)
+    return cells, filled, rois
+
+def recognize_cells(model, rois):
+    """Classifies a (n, 28, 28) stack of cell images with one forward pass and returns the digits."""
+    # One N x 1 x 28 x 28 blob for all the cells, normalized to 0..1
+    blob = (rois[:, np.newaxis] / 255.0).astype(np.float32)
+    model.setInput(blob)
+    preds = model.forward()
+    if preds.shape[0] != len(rois):
+        # models exported with a fixed batch size of 1 need a pass per cell
+        preds = np.concatenate([_forward(model, blob[i:i + 1]) for i in range(len(rois))])
+    return np.argmax(preds.reshape(len(rois), -1), axis=1)
+
+def _forward(model, blob):
+    model.setInput(blob)
+    return model.forward()
+
+def _otsu_thresholds(cells):
+    """Otsu's threshold of each image in a (n, h, w) uint8 stack, computed together."""
+    count = cells.shape[0]
+    pixels = cells.shape[1] * cells.shape[2]
+    offsets = (np.arange(count) * 256)[:, np.newaxis]
+    hist = np.bincount((cells.reshape(count, -1) + offsets).ravel(), minlength=count * 256).reshape(count, 256)
+
+    prob = hist / pixels
+    omega = np.cumsum(prob, axis=1)
+    mu = np.cumsum(prob * np.arange(256), axis=1)
+    mu_total = mu[:, -1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mu_total * omega - mu) ** 2 / (omega * (1.0 - omega))
+    between[~np.isfinite(between)] = 0
+    return np.argmax(between, axis=1)
 
 def _debug_show_img(img, window_name="debug"):
     cv2.imshow(window_name, img)
@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .batch import available_cpus
+from .solver import SudokuSolver
+
+# Set in each worker process by _init_worker; tells running searches to give up.
+_stop = None
+
+def split_board(board, min_subproblems, max_depth=4, size=9):
+    """
+        Expand the first levels of the MRV search tree breadth-first until there
+        are at least `min_subproblems` open boards or `max_depth` branching levels
+        have been expanded. Levels that only fill forced cells do not count towards
+        the depth. Return the boards, in search order, as size * size bytes each.
+    """
+    solver = SudokuSolver("mrv", size=size)
+    solver.load_board(board)
+    frontier = [bytes(solver.cells)]
+    depth = 0
+    while len(frontier) < min_subproblems and depth < max_depth:
+        if all(0 not in subproblem for subproblem in frontier):
+            break
+        expanded = []
+        for subproblem in frontier:
+            solver.load_board(subproblem)
+            expanded.extend(solver.branches())
+        if len(expanded) > len(frontier):
+            depth += 1
+        frontier = expanded
+    return frontier
+
+def _init_worker(stop_event):
+    global _stop
+    _stop = stop_event
+
+def _solve_subproblem(task):
+    """
+        Worker entry point. Run the iterative search in slices of `slice_nodes`
+        trial placements, giving up between slices once another worker has won.
+    """
+    board, size, slice_nodes = task
+    solver = SudokuSolver("iterative", size=size)
+    solver.load_board(board)
+    stats = solver.solve(max_nodes=slice_nodes)
+    while stats.status == "timed_out":
+        if _stop.is_set():
+            return None, solver.nodes, os.getpid()
+        stats = solver.resume(max_nodes=slice_nodes)
+
+    solution = solver.to_bytes() if stats.solved else None
+    return solution, solver.nodes, os.getpid()
+
+def _count_subproblem(task):
+    """
+        Worker entry point. Count the solutions below one subproblem.
+    """
+    board, size, limit = task
+    solver = SudokuSolver("mrv", size=size)
+    solver.load_board(board)
+    count = solver.count_solutions(limit)
+    return count, solver.nodes, os.getpid()
+
+def _record(report, nodes, pid):
+    worker = report.setdefault(pid, {"subproblems": 0, "nodes": 0})
+    worker["subproblems"] += 1
+    worker["nodes"] += nodes
+
+def parallel_solve(board, workers=None, min_subproblems=None, slice_nodes=2000, size=9):
+    """
+        Solve one board by splitting its search tree across a process pool. Once a
+        worker finds a solution, queued subproblems are cancelled and running ones
+        stop at their next slice boundary.
+
+        Return (solution as size * size bytes or None, {pid: {"subproblems", "nodes"}}).
+    """
+    workers = workers or available_cpus()
+    subproblems = split_board(board, min_subproblems or workers * 4, size=size)
+    report = {}
+    solution = None
+    stop_event = multiprocessing.Event()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(stop_event,)) as pool:
+        # submitted in search order so the leftmost branches start first
+        pending = set([pool.submit(_solve_subproblem, (subproblem, size, slice_nodes)) for subproblem in subproblems])
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                result, nodes, pid = future.result()
+                _record(report, nodes, pid)
+                if result is not None and solution is None:
+                    solution = result
+                    stop_event.set()
+                    for other in pending:
+                        other.cancel()
+    return solution, report
+
+def parallel_count(board, limit=None, workers=None, min_subproblems=None, size=9):
+    """
+        Count the solutions of one board by splitting its search tree across a
+        process pool. With a limit, queued subproblems are cancelled once the total
+        reaches it.
+
+        Return (count, {pid: {"subproblems", "nodes"}}).
+    """
+    workers = workers or available_cpus()
+    subproblems = split_board(board, min_subproblems or workers * 4, size=size)
+    report = {}
+    total = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # submitted in search order so the leftmost branches start first
+        pending = set([pool.submit(_count_subproblem, (subproblem, size, limit)) for subproblem in subproblems])
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.cancelled():
+                    continue
+                count, nodes, pid = future.result()
+                _record(report, nodes, pid)
+                total += count
+            if limit is not None and total >= limit:
+                for other in pending:
+                    other.cancel()
+    if limit is not None:
+        total = min(total, limit)
+    return total, report
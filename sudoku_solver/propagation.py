@@ -0,0 +1,272 @@
+from itertools import combinations
+
+from .tables import geometry, popcount
+
+# Techniques applied by ConstraintPropagator, cheapest first.
+TECHNIQUES = (
+    "naked_single",
+    "hidden_single",
+    "pointing",
+    "box_line",
+    "naked_pair",
+    "hidden_pair",
+    "naked_triple",
+    "hidden_triple",
+)
+
+class Contradiction(Exception):
+    """Raised internally when the candidates can no longer lead to a solution."""
+
+class ConstraintPropagator():
+    """
+        Applies human-style deduction techniques to a board until none of them makes
+        progress any more.
+
+        The state is a pair of sequences with one entry per cell: `cells` holds the
+        placed digits (0 for blank) and `candidates` holds a mask of possible digits
+        for each blank cell. Both are updated in place. Hit counts per technique
+        accumulate in `hits` until reset() is called.
+    """
+    def __init__(self, size=9):
+        self.geometry = geometry(size)
+        self.hits = dict.fromkeys(TECHNIQUES, 0)
+
+        # The intersections of each row and column with the boxes it crosses, as
+        # (line unit, box unit, cells), and the indexes of the segments of each
+        # line and, separately for rows and columns, of each box.
+        g = self.geometry
+        self._segments = []
+        self._line_segments = [[] for _ in range(2 * g.size)]
+        self._box_segments = [([], []) for _ in range(g.size)]
+        for line in range(2 * g.size):
+            for box in range(g.size):
+                cells = tuple(cell for cell in g.units[line] if g.box_of[cell] == box)
+                if cells:
+                    self._line_segments[line].append(len(self._segments))
+                    self._box_segments[box][line // g.size].append(len(self._segments))
+                    self._segments.append((line, 2 * g.size + box, cells))
+
+    def reset(self):
+        for technique in TECHNIQUES:
+            self.hits[technique] = 0
+
+    def place(self, cells, candidates, cell, bit):
+        """
+            Place a digit (given as a single-bit mask) and remove it from the peers.
+            Return False if that leaves a peer without candidates.
+        """
+        try:
+            self._assign(cells, candidates, cell, bit)
+        except Contradiction:
+            return False
+        return True
+
+    def propagate(self, cells, candidates):
+        """
+            Run every technique until a fixpoint. Cheap techniques are retried first
+            whenever a more expensive one makes progress. Return False if the board
+            turns out to be unsolvable.
+        """
+        steps = (
+            self._naked_singles,
+            self._hidden_singles,
+            self._locked_candidates,
+            self._naked_subsets,
+            self._hidden_subsets,
+        )
+        try:
+            progress = True
+            while progress:
+                for step in steps:
+                    progress = step(cells, candidates)
+                    if progress:
+                        break
+        except Contradiction:
+            return False
+        return True
+
+    def _assign(self, cells, candidates, cell, bit):
+        digit = bit.bit_length()
+        cells[cell] = digit
+        candidates[cell] = bit
+        for peer in self.geometry.peers[cell]:
+            if cells[peer] == 0:
+                if candidates[peer] & bit:
+                    candidates[peer] &= ~bit
+                    if not candidates[peer]:
+                        raise Contradiction
+            elif cells[peer] == digit:
+                raise Contradiction
+
+    def _eliminate(self, cells, candidates, targets, mask):
+        """
+            Remove the digits in mask from the blank target cells. Return True if
+            anything was removed.
+        """
+        changed = False
+        for cell in targets:
+            if cells[cell] == 0 and candidates[cell] & mask:
+                candidates[cell] &= ~mask
+                if not candidates[cell]:
+                    raise Contradiction
+                changed = True
+        return changed
+
+    def _naked_singles(self, cells, candidates):
+        """
+            Fill every blank cell that has exactly one candidate left.
+        """
+        changed = False
+        for cell in range(self.geometry.cells):
+            if cells[cell] == 0:
+                mask = candidates[cell]
+                if not mask:
+                    raise Contradiction
+                if popcount(mask) == 1:
+                    self._assign(cells, candidates, cell, mask)
+                    self.hits["naked_single"] += 1
+                    changed = True
+        return changed
+
+    def _hidden_singles(self, cells, candidates):
+        """
+            Fill a cell when it is the only place left for a digit in one of its units.
+        """
+        all_digits = self.geometry.all_digits
+        changed = False
+        for unit in self.geometry.units:
+            seen_once = 0
+            seen_twice = 0
+            placed = 0
+            for cell in unit:
+                if cells[cell]:
+                    placed |= 1 << (cells[cell] - 1)
+                else:
+                    seen_twice |= seen_once & candidates[cell]
+                    seen_once |= candidates[cell]
+            if (seen_once | placed) != all_digits:
+                raise Contradiction
+
+            hidden = seen_once & ~seen_twice & ~placed
+            while hidden:
+                bit = hidden & -hidden
+                hidden ^= bit
+                for cell in unit:
+                    if cells[cell] == 0 and candidates[cell] & bit:
+                        self._assign(cells, candidates, cell, bit)
+                        self.hits["hidden_single"] += 1
+                        changed = True
+                        break
+        return changed
+
+    def _locked_candidates(self, cells, candidates):
+        """
+            Pointing: when a digit's places in a box all share a row or column, remove
+            it from the rest of that line. Box/line reduction: when a digit's places in
+            a row or column all share a box, remove it from the rest of that box.
+
+            Works on the candidates of each row/box and column/box intersection, so a
+            digit is confined to a segment when no other segment of the unit has it.
+        """
+        units = self.geometry.units
+        segments = self._segments
+        masks = []
+        for _, _, segment in segments:
+            mask = 0
+            for cell in segment:
+                if cells[cell] == 0:
+                    mask |= candidates[cell]
+            masks.append(mask)
+
+        changed = False
+        for groups, technique in ((self._line_segments, "box_line"),
+                                  ([group for pair in self._box_segments for group in pair], "pointing")):
+            for group in groups:
+                for index in group:
+                    others = 0
+                    for other in group:
+                        if other != index:
+                            others |= masks[other]
+                    confined = masks[index] & ~others
+                    if not confined:
+                        continue
+                    line, box, segment = segments[index]
+                    targets = units[box] if technique == "box_line" else units[line]
+                    targets = [cell for cell in targets if cell not in segment]
+                    while confined:
+                        bit = confined & -confined
+                        confined ^= bit
+                        if self._eliminate(cells, candidates, targets, bit):
+                            self.hits[technique] += 1
+                            changed = True
+        return changed
+
+    def _naked_subsets(self, cells, candidates):
+        """
+            When k blank cells of a unit share only k candidates between them, those
+            digits can be removed from the other cells of the unit (k = 2, 3).
+        """
+        for size, technique in ((2, "naked_pair"), (3, "naked_triple")):
+            changed = False
+            for unit in self.geometry.units:
+                blanks = [cell for cell in unit if cells[cell] == 0]
+                if len(blanks) <= size:
+                    continue
+                small = [cell for cell in blanks if popcount(candidates[cell]) <= size]
+                for subset in combinations(small, size):
+                    mask = 0
+                    for cell in subset:
+                        mask |= candidates[cell]
+                    if popcount(mask) < size:
+                        raise Contradiction
+                    if popcount(mask) == size:
+                        others = [cell for cell in blanks if cell not in subset]
+                        if self._eliminate(cells, candidates, others, mask):
+                            self.hits[technique] += 1
+                            changed = True
+            if changed:
+                return True
+        return False
+
+    def _hidden_subsets(self, cells, candidates):
+        """
+            When k digits of a unit can only go in the same k cells, those cells can
+            hold no other digits (k = 2, 3).
+        """
+        for size, technique in ((2, "hidden_pair"), (3, "hidden_triple")):
+            changed = False
+            for unit in self.geometry.units:
+                blanks = [cell for cell in unit if cells[cell] == 0]
+                if len(blanks) <= size:
+                    continue
+
+                # for each unplaced digit, the mask of positions (within blanks) it can take
+                where_of = {}
+                for position, cell in enumerate(blanks):
+                    mask = candidates[cell]
+                    while mask:
+                        bit = mask & -mask
+                        mask ^= bit
+                        where_of[bit] = where_of.get(bit, 0) | (1 << position)
+                places = {bit: where for bit, where in sorted(where_of.items()) if popcount(where) <= size}
+
+                for digits in combinations(places, size):
+                    where = 0
+                    for bit in digits:
+                        where |= places[bit]
+                    if popcount(where) < size:
+                        raise Contradiction
+                    if popcount(where) != size:
+                        continue
+                    keep = sum(digits)
+                    hit = False
+                    for position, cell in enumerate(blanks):
+                        if where & (1 << position) and candidates[cell] & ~keep:
+                            candidates[cell] &= keep
+                            hit = True
+                    if hit:
+                        self.hits[technique] += 1
+                        changed = True
+            if changed:
+                return True
+        return False
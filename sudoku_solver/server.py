@@ -0,0 +1,368 @@
+import argparse
+import asyncio
+import base64
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from .batch import available_cpus
+from .solver import STRATEGIES, SudokuSolver
+from .tables import SIZES
+
+# Upper bounds (in milliseconds) of the latency histogram buckets; the last
+# bucket catches everything slower.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Largest request body and number of puzzles accepted in one request.
+MAX_BODY = 16 * 1024 * 1024
+MAX_BATCH = 10000
+
+# Seconds a request may spend solving by default. Puzzles still unsolved when
+# it runs out are answered with the status "timed_out".
+TIME_LIMIT = 5.0
+
+# Set in each worker process by _init_worker.
+_solvers = {}
+_recognizer = None
+
+def _init_worker(model_path):
+    global _recognizer
+    if model_path is not None:
+        from . import image_process
+        _recognizer = image_process.load_recognizer(model_path)
+
+def _solver(strategy, size):
+    """
+        The worker's solver for a strategy and size, created on first use.
+    """
+    key = (strategy, size)
+    if key not in _solvers:
+        _solvers[key] = SudokuSolver(strategy, size=size)
+    return _solvers[key]
+
+class _OutOfTime(Exception):
+    """Raised from the solver hook once a request has used up its time."""
+
+def _deadline_hook(deadline):
+    """
+        A solver hook that stops the search at the first placement past the deadline.
+    """
+    def hook(event, info):
+        if event == "place" and time.perf_counter() >= deadline:
+            raise _OutOfTime
+    return hook
+
+def _solve_one(solver, puzzle, deadline):
+    """
+        Solve one puzzle, giving up at the deadline (a time.perf_counter() value).
+        The iterative strategy stops on its own time budget; the others are
+        stopped from the event hook.
+    """
+    if not isinstance(puzzle, (str, list)):
+        return {"status": "error", "error": "A puzzle must be a string or a list of rows."}
+    try:
+        solver.load_board(puzzle)
+    except (ValueError, TypeError) as e:
+        return {"status": "error", "error": str(e)}
+
+    start = time.perf_counter()
+    if solver.strategy == "iterative":
+        stats = solver.solve(time_limit=max(0.0, deadline - start))
+    else:
+        solver.hook = _deadline_hook(deadline)
+        try:
+            stats = solver.solve()
+        except _OutOfTime:
+            return {"status": "timed_out", "solution": None, "nodes": solver.nodes,
+                    "time_ms": (time.perf_counter() - start) * 1000}
+        finally:
+            solver.hook = None
+    return {
+        "status": stats.status,
+        "solution": solver.to_string() if stats.solved else None,
+        "nodes": stats.nodes,
+        "time_ms": stats.total_time * 1000,
+    }
+
+def _solve_puzzles(task):
+    """
+        Worker entry point. Solve a list of puzzles within `time_limit` seconds
+        in total and return one result each.
+    """
+    strategy, size, time_limit, puzzles = task
+    solver = _solver(strategy, size)
+    deadline = time.perf_counter() + time_limit
+    return [_solve_one(solver, puzzle, deadline) for puzzle in puzzles]
+
+def _solve_image(task):
+    """
+        Worker entry point. Read the board in an encoded image and solve it.
+    """
+    strategy, profile, time_limit, data = task
+    if _recognizer is None:
+        return {"status": "error", "error": "The digit model could not be loaded."}
+    board = _recognizer.extract_board(data, profile=profile)
+    if board is None:
+        return {"status": "error", "error": "Could not find a Sudoku grid in the image."}
+    solver = _solver(strategy, 9)
+    solver.load_board(board)
+    puzzle = solver.to_string()
+    result = _solve_one(solver, puzzle, time.perf_counter() + time_limit)
+    result["puzzle"] = puzzle
+    return result
+
+class Histogram():
+    """
+        Latency histogram with fixed buckets, in milliseconds.
+    """
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total_ms += ms
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def as_dict(self):
+        buckets = {f"le_{bound}": count for bound, count in zip(BUCKETS_MS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "buckets": buckets,
+        }
+
+class SolverService():
+    """
+        Serves solves over HTTP/JSON on top of a process pool. At most
+        `max_queue` jobs (one per request) are running or waiting for a worker;
+        further requests are turned away with 503 until some finish. Each
+        request may spend `time_limit` seconds solving, so a hard puzzle cannot
+        hold a worker indefinitely.
+
+            POST /solve    {"puzzle": ...} or {"puzzles": [...]}, each an 81-character
+                           string or a list of rows; optional "strategy", "size" and
+                           "time_limit" (seconds, at most the server's)
+            POST /image    an encoded image, raw or as {"image": "<base64>"}
+            GET  /metrics  request counts and latency histograms per route
+            GET  /health
+    """
+    def __init__(self, strategy=None, size=9, workers=None, max_queue=64, model_path=None, profile="robust",
+                 time_limit=TIME_LIMIT):
+        self.strategy = strategy
+        self.size = size
+        self.time_limit = time_limit
+        self.workers = workers or available_cpus()
+        self.max_queue = max_queue
+        self.model_path = model_path
+        self.profile = profile
+        self.pool = None
+        self.pending = 0
+        self.started = time.time()
+        self.requests = {}
+        self.errors = {}
+        self.rejected = 0
+        self.latency = {}
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(self.model_path,))
+        try:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+            print(f"Serving on http://{host}:{port} with {self.workers} workers.")
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                start = time.perf_counter()
+                status, payload = await self._route(method, path, headers, body)
+                self._record(path, status, time.perf_counter() - start)
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError as e:
+            self._write_response(writer, HTTPStatus.BAD_REQUEST, {"error": str(e)}, False)
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        """
+            Read one request. Return (method, path, headers, body), or None once
+            the client has closed the connection.
+        """
+        line = await reader.readline()
+        if not line:
+            return None
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise ValueError("Malformed request line.")
+        method, path, _ = parts
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY:
+            raise ValueError(f"Request bodies are limited to {MAX_BODY} bytes.")
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?", 1)[0], headers, body
+
+    def _write_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        status = HTTPStatus(status)
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+
+    async def _route(self, method, path, headers, body):
+        if path == "/solve" and method == "POST":
+            return await self._solve(body)
+        if path == "/image" and method == "POST":
+            return await self._image(headers, body)
+        if path == "/metrics" and method == "GET":
+            return HTTPStatus.OK, self.metrics()
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, {"status": "ok"}
+        if path in ("/solve", "/image", "/metrics", "/health"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} is not allowed on {path}."}
+        return HTTPStatus.NOT_FOUND, {"error": f"Unknown path '{path}'."}
+
+    async def _solve(self, body):
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, {"error": "The body must be JSON."}
+        if not isinstance(request, dict) or ("puzzle" in request) == ("puzzles" in request):
+            return HTTPStatus.BAD_REQUEST, {"error": "Send either 'puzzle' or 'puzzles'."}
+
+        strategy = request.get("strategy", self.strategy)
+        size = request.get("size", self.size)
+        if strategy is not None and strategy not in STRATEGIES:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Unknown strategy '{strategy}'."}
+        if size not in SIZES:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Unsupported board size {size}."}
+        time_limit = request.get("time_limit", self.time_limit)
+        if not isinstance(time_limit, (int, float)) or time_limit <= 0:
+            return HTTPStatus.BAD_REQUEST, {"error": "'time_limit' must be a positive number of seconds."}
+        time_limit = min(time_limit, self.time_limit)
+
+        puzzles = request["puzzles"] if "puzzles" in request else [request["puzzle"]]
+        if not isinstance(puzzles, list):
+            return HTTPStatus.BAD_REQUEST, {"error": "'puzzles' must be a list."}
+        if len(puzzles) > MAX_BATCH:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": f"At most {MAX_BATCH} puzzles per request."}
+
+        status, results = await self._submit(_solve_puzzles, (strategy, size, time_limit, puzzles))
+        if status != HTTPStatus.OK:
+            return status, results
+        if "puzzle" in request:
+            return HTTPStatus.BAD_REQUEST if results[0]["status"] == "error" else HTTPStatus.OK, results[0]
+        return HTTPStatus.OK, {"results": results}
+
+    async def _image(self, headers, body):
+        if self.model_path is None:
+            return HTTPStatus.NOT_FOUND, {"error": "Image solving is not enabled on this server."}
+        if headers.get("content-type", "").startswith("application/json"):
+            try:
+                body = base64.b64decode(json.loads(body)["image"])
+            except (ValueError, KeyError, TypeError):
+                return HTTPStatus.BAD_REQUEST, {"error": "Expected {\"image\": \"<base64>\"}."}
+        if not body:
+            return HTTPStatus.BAD_REQUEST, {"error": "The image is empty."}
+        return await self._submit(_solve_image, (self.strategy, self.profile, self.time_limit, body))
+
+    async def _submit(self, worker, task):
+        """
+            Run a job in the process pool, or turn it away if the queue is full.
+        """
+        if self.pending >= self.max_queue:
+            self.rejected += 1
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "The server is busy, try again later."}
+        self.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.pool, worker, task)
+        finally:
+            self.pending -= 1
+        return HTTPStatus.OK, result
+
+    def _record(self, path, status, seconds):
+        if path not in ("/solve", "/image", "/metrics", "/health"):
+            path = "other"
+        self.requests[path] = self.requests.get(path, 0) + 1
+        if status >= 400:
+            self.errors[path] = self.errors.get(path, 0) + 1
+        self.latency.setdefault(path, Histogram()).observe(seconds)
+
+    def metrics(self):
+        return {
+            "uptime_seconds": time.time() - self.started,
+            "workers": self.workers,
+            "queue_limit": self.max_queue,
+            "queue_depth": self.pending,
+            "rejected": self.rejected,
+            "requests": dict(self.requests),
+            "errors": dict(self.errors),
+            "latency_ms": {path: histogram.as_dict() for path, histogram in self.latency.items()},
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="sudoku-solver serve", description="Serve Sudoku solves over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("-p", "--port", type=int, default=8080, help="Port to listen on.")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes. Defaults to the available cores.")
+    parser.add_argument("-q", "--queue", type=int, default=64, help="Requests allowed to run or wait at once before answering 503.")
+    parser.add_argument("-s", "--strategy", default=None, choices=STRATEGIES, help="Default solving strategy. Defaults to the fastest for the board size.")
+    parser.add_argument("--size", type=int, default=9, choices=SIZES, help="Default board size (rows per board).")
+    parser.add_argument("-t", "--time-limit", type=float, default=TIME_LIMIT, help="Seconds a request may spend solving before answering timed_out.")
+    parser.add_argument("--images", action="store_true", help="Also accept puzzle images on /image.")
+    parser.add_argument("-m", "--model", default="mnist.onnx", help="Path to the ONNX model file for --images.")
+    parser.add_argument("--offline", action="store_true", help="Never download the model; --model must point at a local file.")
+    parser.add_argument("--profile", default="robust", choices=("fast", "robust"), help="Image preprocessing profile.")
+    args = parser.parse_args(argv)
+
+    model_path = None
+    if args.images:
+        from . import image_process
+        model_path = image_process.download_model(args.model, args.offline)
+        if model_path is None:
+            print("Could not download or find the model. Exiting.")
+            return
+
+    service = SolverService(args.strategy, args.size, args.workers, args.queue, model_path, args.profile, args.time_limit)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+from .solver import SYMBOLS, SudokuSolver
+from .tables import geometry, popcount
+
+# Trial placements hint() may spend by default looking for a solution.
+HINT_MAX_NODES = 100000
+
+class SolveSession():
+    """
+        A board edited one cell at a time, e.g. from an interactive editor. The
+        digit counts per row, column and box are kept up to date on each edit, so
+        candidates, conflicts and dead ends are known without reloading the board.
+
+        Cells are given either as an index 0 to size * size - 1 or as a
+        (row, column) pair, and digits as 1 to size.
+    """
+    def __init__(self, board=None, size=9):
+        self.size = size
+        self.geometry = geometry(size)
+        g = self.geometry
+        self.cells = bytearray(g.cells)
+
+        # Units of each cell as indexes into _counts/_masks: row, column, box.
+        self._units = [(g.row_of[i], size + g.col_of[i], 2 * size + g.box_of[i]) for i in range(g.cells)]
+
+        # How often each digit is placed in each unit, and the mask of the placed ones.
+        self._counts = [bytearray(size + 1) for _ in range(3 * size)]
+        self._masks = [0] * (3 * size)
+
+        # Number of (unit, digit) pairs placed more than once, and blank cells left
+        # without candidates.
+        self._conflicts = 0
+        self._dead = set()
+
+        # A solution consistent with the current board, kept while edits agree with it.
+        self._solution = None
+
+        # Iterative solver used to parse boards and to search for a solution.
+        self._solver = SudokuSolver("iterative", size=size)
+        if board is not None:
+            self.load_board(board)
+
+    def load_board(self, board):
+        """
+            Replace the whole board with anything SudokuSolver.load_board accepts.
+        """
+        solver = self._solver
+        solver.load_board(board)
+        self.cells = bytearray(len(solver.cells))
+        for counts in self._counts:
+            counts[:] = bytes(len(counts))
+        self._masks = [0] * len(self._masks)
+        self._conflicts = 0
+        self._dead = set()
+        self._solution = None
+        for cell, digit in enumerate(solver.cells):
+            if digit:
+                self._add(cell, digit)
+        for cell in range(len(self.cells)):
+            self._check_dead(cell)
+
+    def set_cell(self, cell, digit):
+        """
+            Place a digit, replacing whatever the cell held. Returns whether the
+            board is still consistent.
+        """
+        cell = self._index(cell)
+        if not 1 <= digit <= self.size:
+            raise ValueError(f"Digits must be between 1 and {self.size}.")
+        if self.cells[cell]:
+            self._remove(cell)
+        self._add(cell, digit)
+        self._update_dead(cell)
+        if self._solution is not None and self._solution[cell] != digit:
+            self._solution = None
+        return self.is_consistent()
+
+    def clear_cell(self, cell):
+        """
+            Blank a cell. A known solution stays valid since no constraint was added.
+        """
+        cell = self._index(cell)
+        if self.cells[cell]:
+            self._remove(cell)
+            self._update_dead(cell)
+
+    def candidates(self, cell):
+        """
+            The digits that can go in a blank cell without a conflict, in order. A
+            filled cell has none.
+        """
+        cell = self._index(cell)
+        mask = self._candidate_mask(cell)
+        return [digit for digit in range(1, self.size + 1) if mask & (1 << (digit - 1))]
+
+    def conflicts(self):
+        """
+            The filled cells whose digit repeats in their row, column or box.
+        """
+        return [cell for cell, digit in enumerate(self.cells)
+                if digit and any(self._counts[unit][digit] > 1 for unit in self._units[cell])]
+
+    def is_consistent(self):
+        """
+            True if no digit repeats in a unit and every blank cell has a candidate.
+            This is a quick check; see is_solvable() for a complete one.
+        """
+        return self._conflicts == 0 and not self._dead
+
+    def is_solvable(self, max_nodes=None):
+        """
+            Search from the current state for a solution. Returns True or False, or
+            None if `max_nodes` trial placements were not enough to decide. The
+            solution found is kept for hint() until an edit contradicts it.
+        """
+        if self._solution is not None:
+            return True
+        if not self.is_consistent():
+            return False
+        solver = self._solver
+        solver.load_board(self.cells)
+        stats = solver.solve(max_nodes=max_nodes)
+        if solver.status == "timed_out":
+            return None
+        if stats.solved:
+            self._solution = solver.to_bytes()
+        return stats.solved
+
+    def hint(self, max_nodes=HINT_MAX_NODES):
+        """
+            Suggest a (cell index, digit) to fill next: a blank cell with a single
+            candidate if there is one, otherwise the blank cell with the fewest
+            candidates, with its digit taken from a solution. None if the board is
+            full, has no solution or `max_nodes` trial placements (None for no
+            limit) were not enough to find one.
+        """
+        best = None
+        best_count = self.size + 1
+        for cell in range(len(self.cells)):
+            if self.cells[cell] == 0:
+                count = popcount(self._candidate_mask(cell))
+                if count < best_count:
+                    best, best_count = cell, count
+                    if count <= 1:
+                        break
+        if best is None or not self.is_solvable(max_nodes):
+            return None
+        return best, self._solution[best]
+
+    def to_string(self):
+        return ''.join(chr(SYMBOLS[digit]) for digit in self.cells)
+
+    @property
+    def board(self):
+        """
+            A copy of the board as a new list of rows; edit it with set_cell and
+            clear_cell.
+        """
+        size = self.size
+        return [list(self.cells[r * size:(r + 1) * size]) for r in range(size)]
+
+    def _index(self, cell):
+        if isinstance(cell, tuple):
+            row, col = cell
+            if not (0 <= row < self.size and 0 <= col < self.size):
+                raise ValueError(f"Cell {cell} is outside the board.")
+            return row * self.size + col
+        if not 0 <= cell < len(self.cells):
+            raise ValueError(f"Cell {cell} is outside the board.")
+        return cell
+
+    def _candidate_mask(self, cell):
+        if self.cells[cell]:
+            return 0
+        r, c, b = self._units[cell]
+        masks = self._masks
+        return self.geometry.all_digits & ~(masks[r] | masks[c] | masks[b])
+
+    def _add(self, cell, digit):
+        self.cells[cell] = digit
+        bit = 1 << (digit - 1)
+        for unit in self._units[cell]:
+            counts = self._counts[unit]
+            counts[digit] += 1
+            if counts[digit] == 1:
+                self._masks[unit] |= bit
+            elif counts[digit] == 2:
+                self._conflicts += 1
+
+    def _remove(self, cell):
+        digit = self.cells[cell]
+        self.cells[cell] = 0
+        bit = 1 << (digit - 1)
+        for unit in self._units[cell]:
+            counts = self._counts[unit]
+            counts[digit] -= 1
+            if counts[digit] == 0:
+                self._masks[unit] &= ~bit
+            elif counts[digit] == 1:
+                self._conflicts -= 1
+
+    def _update_dead(self, cell):
+        """
+            Recheck the only cells whose candidates an edit can change.
+        """
+        self._check_dead(cell)
+        for peer in self.geometry.peers[cell]:
+            self._check_dead(peer)
+
+    def _check_dead(self, cell):
+        if self.cells[cell] == 0 and not self._candidate_mask(cell):
+            self._dead.add(cell)
+        else:
+            self._dead.discard(cell)
@@ -1,59 +1,316 @@
 import os
+import time
+
+from .propagation import TECHNIQUES, ConstraintPropagator
+from .stats import SolveStats
+from .tables import geometry, popcount
+
+# Solving strategies understood by SudokuSolver.solve().
+STRATEGIES = ("bitmask", "mrv", "iterative", "propagate", "dlx", "classic")
+
+# Strategy used for each board size when none is given, the quickest in the
+# benchmark: propagate rarely needs to guess on 4x4, 9x9 and 25x25 boards, while
+# dancing links is quicker on 16x16 boards.
+DEFAULT_STRATEGIES = {4: "propagate", 9: "propagate", 16: "dlx", 25: "propagate"}
+
+# Symbols of the one-line text format: '0' (or '.') for blanks, then 1-9 and A-P
+# (either case) for the digits 10-25 of larger boards.
+SYMBOLS = b"0123456789ABCDEFGHIJKLMNOP"
+
+# Translation tables between raw cell values and text. Anything that is not a
+# symbol is left as is and rejected by the range check in load_board.
+_FROM_TEXT = bytes.maketrans(SYMBOLS + SYMBOLS[10:].lower() + b".", bytes(range(26)) + bytes(range(10, 26)) + b"\0")
+_TO_TEXT = bytes.maketrans(bytes(range(26)), SYMBOLS)
 
 class SudokuSolver():
-    def __init__(self):
-        self.board = []
+    """
+        Solves a size x size board (9x9 by default, or any of SIZES) with one of
+        the STRATEGIES, by default the one DEFAULT_STRATEGIES gives for the size.
+
+        `hook`, if given, is called as hook(event, info) from the search so callers
+        can sample what the solver is doing:
+            "place"     (cell, digit, depth) for every trial placement
+            "backtrack" (cell, digit, depth) when a trial placement is undone
+            "phase"     (name, seconds, cells_filled) when a phase finishes
+            "done"      (stats,) when solve() returns
+
+        `cache`, if given, is a SolutionCache consulted before solving and filled
+        with every board solve() completes.
+    """
+    def __init__(self, strategy=None, hook=None, size=9, cache=None):
+        if strategy is None:
+            strategy = DEFAULT_STRATEGIES.get(size, "bitmask")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}'. Choose from: {', '.join(STRATEGIES)}.")
+        self.strategy = strategy
+
+        # Board geometry and shortcuts to the index tables used in the hot loops.
+        self.size = size
+        self.geometry = geometry(size)
+        self._all_digits = self.geometry.all_digits
+        self._row_of = self.geometry.row_of
+        self._col_of = self.geometry.col_of
+        self._box_of = self.geometry.box_of
+        self._peers = self.geometry.peers
+        self._cell_units = self.geometry.cell_units
+
+        # The board as row-major cells holding 0 (blank) to size.
+        self.cells = bytearray(self.geometry.cells)
+
+        # Candidate lists of the blank cells, used by the classic engine.
         self.possible_moves = {}
 
+        # Search counters of the last solve, see SolveStats.
+        self.hook = hook
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.stats = None
+        self._search_size = 0 # blank cells when the current search started
+
+        # Outcome of the last solve: "solved", "unsolved" or, for the iterative
+        # strategy, "timed_out" when it ran out of budget and can be resumed.
+        self.status = None
+
+        # Explicit search state of the iterative engine. Each frame on the stack is
+        # [cell, candidates still to try, digit bit currently placed].
+        self._stack = []
+        self._need_cell = False
+
+        # Occupancy masks used by the bitmask engine. Bit (n - 1) is set when
+        # digit n is already placed in that row, column or box. They are reset in
+        # place so one solver can be reused across many puzzles.
+        self.row_masks = [0] * size
+        self.col_masks = [0] * size
+        self.box_masks = [0] * size
+
+        # Exact cover matrix for the DLX engine, built on first use and reused.
+        self._dlx = None
+
+        # Deduction engine for the propagate strategy, and how often each of its
+        # techniques fired during the last solve.
+        self._propagator = ConstraintPropagator(size)
+        self.technique_hits = dict.fromkeys(TECHNIQUES, 0)
+
+        # Solutions of earlier boards, keyed by their canonical form, and the form
+        # of the board missed by the last lookup so it is not computed again.
+        self.cache = cache
+        self._cache_form = None
+
     # Load the puzzle from text file
     def load_csv(self, filename):
         if os.path.isfile(filename):
             with open(filename, "r") as rFile:
                 lines = rFile.readlines()
 
-                r, c = 9, 9
-                self.board = [[0 for x in range(c)] for y in range(r)]
+                r, c = self.size, self.size
+                board = [[0 for x in range(c)] for y in range(r)]
                 row = 0
                 col = 0
         
                 for l in lines:
                     currLine = l.split(",")
                     for num in currLine:
-                        self.board[row][col] = int(num)
+                        board[row][col] = int(num)
                         col += 1
                     col = 0
                     row += 1
+                self.load_board(board)
         else:
             print(f"Error: Can't find the file '{filename}'.")
             exit(1) # Exit if the file doesn't exist
         return
 
     def load_board(self, board):
-        self.board = board
+        """
+            Load a board from a list of rows, a flat list of cells, a NumPy array, a
+            string in the one-line format or bytes, each holding size x size cells.
+            Strings and bytes may use '0' or '.' for blanks and A-P for 10-25; bytes
+            may also hold the raw cell values.
+        """
+        if isinstance(board, str):
+            board = board.encode("ascii", "replace")
+        if isinstance(board, (bytes, bytearray, memoryview)):
+            cells = bytes(board).translate(_FROM_TEXT)
+        elif hasattr(board, "tobytes") and hasattr(board, "astype"):
+            # NumPy arrays are converted in one step, without touching every cell
+            cells = board.astype("uint8").tobytes()
+        elif len(board) == len(self.cells):
+            cells = bytes(board) # already flat
+        else:
+            cells = bytes(number for row in board for number in row)
+
+        if len(cells) != len(self.cells):
+            raise ValueError(f"Expected {len(self.cells)} cells but got {len(cells)}.")
+        if max(cells) > self.size:
+            raise ValueError(f"Cell values must be between 0 and {self.size}.")
+        self.cells[:] = cells
+        self._stack = []
+        self.status = None
+
+    @property
+    def board(self):
+        """
+            A copy of the board as a new list of rows, so writing to it leaves the
+            solver unchanged. Assign a whole board here or call load_board to
+            change it.
+        """
+        return self.to_list()
+
+    @board.setter
+    def board(self, board):
+        self.load_board(board)
+
+    def to_list(self):
+        cells, size = self.cells, self.size
+        return [list(cells[r:r + size]) for r in range(0, len(cells), size)]
+
+    def to_bytes(self):
+        return bytes(self.cells)
+
+    def to_string(self):
+        return self.cells.translate(_TO_TEXT).decode("ascii")
+
+    def to_numpy(self):
+        """
+            Return a size x size uint8 NumPy view of the board. It shares memory with the
+            solver, so copy it before loading the next puzzle.
+        """
+        import numpy as np
+        return np.frombuffer(self.cells, dtype=np.uint8).reshape(self.size, self.size)
 
     # Display current board
     def display_board(self):
-        for row in range(9):
-            for col in range(9):
-                if self.board[row][col] == 0:
-                    print('_', end=' ')
+        size, box = self.size, self.geometry.box
+        width = len(str(size))
+        separator = '-' * (size * (width + 1) + (box - 1) * 2 - 1)
+        for row in range(size):
+            for col in range(size):
+                number = self.cells[row * size + col]
+                if number == 0:
+                    print('_'.rjust(width), end=' ')
                 else:
-                    print(self.board[row][col], end=' ')
-                if col == 2 or col == 5:
+                    print(str(number).rjust(width), end=' ')
+                if col % box == box - 1 and col != size - 1:
                     print('|', end=' ')
             print()
-            if row == 2 or row == 5:
-                print('---------------------')
+            if row % box == box - 1 and row != size - 1:
+                print(separator)
 
         return
 
+    # Solve the board in place with the selected strategy.
+    def solve(self, max_nodes=None, time_limit=None):
+        """
+            Solve the loaded board in place and return a SolveStats for this call.
+
+            The iterative strategy accepts a budget of trial placements (max_nodes)
+            and/or seconds (time_limit). When it runs out, the status is "timed_out"
+            and resume() continues the search where it stopped.
+        """
+        if (max_nodes is not None or time_limit is not None) and self.strategy != "iterative":
+            raise ValueError("A search budget is only supported by the 'iterative' strategy.")
+
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.stats = SolveStats(self.strategy)
+        self.status = None
+        start = time.perf_counter()
+
+        if self.cache is not None:
+            if self._run_phase("cache", self._lookup_cache):
+                return self._finish(start)
+
+        if self.strategy == "classic":
+            self._solve_classic()
+        elif self.strategy == "mrv":
+            self._run_phase("search", self._solve_mrv)
+        elif self.strategy == "iterative":
+            self._stack = []
+            self._run_phase("search", lambda: self._solve_iterative(max_nodes, time_limit, True))
+        elif self.strategy == "propagate":
+            self._solve_propagate()
+        elif self.strategy == "dlx":
+            self._run_phase("search", self._solve_dlx)
+        else:
+            self._solve_bitmask()
+
+        stats = self._finish(start)
+        if self.cache is not None and stats.solved:
+            self.cache.store(self._cache_form, self.cells)
+        return stats
+
+    def _lookup_cache(self):
+        """
+            Fill the board from the cache. Return True on a hit.
+        """
+        solution, self._cache_form = self.cache.lookup(self.cells)
+        if solution is None:
+            return False
+        self.cells[:] = solution
+        self.technique_hits = dict.fromkeys(TECHNIQUES, 0)
+        return True
+
+    def resume(self, max_nodes=None, time_limit=None):
+        """
+            Continue an iterative search that timed out, with a fresh budget. The
+            counters keep accumulating across resumes, and a solution found is
+            stored in the cache as by solve().
+        """
+        if self.status != "timed_out":
+            raise RuntimeError("There is no paused search to resume.")
+        self.stats = SolveStats(self.strategy)
+        self.status = None
+        start = time.perf_counter()
+        self._run_phase("search", lambda: self._solve_iterative(max_nodes, time_limit, False))
+        stats = self._finish(start)
+        if self.cache is not None and stats.solved:
+            self.cache.store(self._cache_form, self.cells)
+        return stats
+
+    def _finish(self, start):
+        stats = self.stats
+        stats.total_time = time.perf_counter() - start
+        # a full board only counts as solved if no digit repeats in a unit
+        stats.solved = self.get_empty_cell_count() == 0 and self._init_masks()
+        if self.status is None:
+            self.status = "solved" if stats.solved else "unsolved"
+        stats.status = self.status
+        stats.nodes = self.nodes
+        stats.backtracks = self.backtracks
+        stats.max_depth = self.max_depth
+        if self.strategy == "propagate":
+            stats.technique_hits = dict(self.technique_hits)
+        if self.hook is not None:
+            self.hook("done", (stats,))
+        return stats
+
+    def _run_phase(self, name, method):
+        """
+            Run one step of a strategy and record its time and the cells it filled.
+        """
+        blanks = self.get_empty_cell_count()
+        start = time.perf_counter()
+        result = method()
+        self._end_phase(name, start, blanks)
+        return result
+
+    def _end_phase(self, name, start, blanks):
+        seconds = time.perf_counter() - start
+        filled = blanks - self.get_empty_cell_count()
+        self.stats.add_phase(name, seconds, filled)
+        if self.hook is not None:
+            self.hook("phase", (name, seconds, filled))
+
     # Try to use all three approaches to solve the game.
-    def solve(self):
-        self._solve1()
+    def _solve_classic(self):
+        self.possible_moves = {}
+        self._run_phase("solve1", self._solve1)
         if self.get_empty_cell_count() != 0:
-            self._solve2()
+            self._run_phase("solve2", self._solve2)
         if self.get_empty_cell_count() != 0:
-            self._solve3()
+            self._run_phase("solve3", self._solve3)
         return
 
     # Method 1: using heuristic (possible moves) to fill in the easy ones.
@@ -63,20 +320,17 @@ class SudokuSolver():
             there is only one possible move for that cell. Backtrack and update the ones that
             we have already checked and affected by our move.
         """
-        # Go through rows
-        for row in range(9):
-            # Go through column
-            for col in range(9):
-                if self.board[row][col] == 0:    # if the block is empty
-                    valid_moves = self._calculate_moves((row, col))    # get all valid moves
-                    
-                    if len(valid_moves) == 1:   # if there's only one possible move
-                        move = valid_moves[0]   # fill in the blank with that number
-                        self.board[row][col] = move
-                        self._examine((row, col), move)  # check other blocks affected by this move
+        for cell in range(len(self.cells)):
+            if self.cells[cell] == 0:    # if the block is empty
+                valid_moves = self._calculate_moves(cell)    # get all valid moves
 
-                    else:
-                        self.possible_moves[(row, col)] = valid_moves    # otherwise remember possible moves for this block
+                if len(valid_moves) == 1:   # if there's only one possible move
+                    move = valid_moves[0]   # fill in the blank with that number
+                    self.cells[cell] = move
+                    self._examine(cell, move)  # check other blocks affected by this move
+
+                else:
+                    self.possible_moves[cell] = valid_moves    # otherwise remember possible moves for this block
 
         self._clean() # get rid of the cells that have been solved
         return
@@ -97,68 +351,21 @@ class SudokuSolver():
         for key_1 in list(self.possible_moves.keys()):
             # A cell is 0 if it has been checked
             if key_1 in self.possible_moves and self.possible_moves[key_1][0] != 0:
-                # Check rows first
-                union_set = []
-                for key_2 in self.possible_moves.keys():
-                    if key_1[0] == key_2[0]:
-                        if key_2 != key_1:
-                            union_set.append(set(self.possible_moves[key_2]))
-                
-                if union_set:
-                    check = list(set(self.possible_moves[key_1]) - set.union(*union_set))
-                else:
-                    check = self.possible_moves[key_1]
-
-
-                if len(check) == 1 and check[0] != 0:
-                    move = check[0]
-                    self.board[key_1[0]][key_1[1]] = move
-                    del self.possible_moves[key_1] # remove key since it's done
-                    self._examine(key_1, move)
-                    continue
-
-                # Check col next
-                union_set2 = []
-                for key_2 in self.possible_moves.keys():
-                    if key_1[1] == key_2[1]:
-                        if key_2 != key_1:
-                            union_set2.append(set(self.possible_moves[key_2]))
-                
-                if union_set2:
-                    check2 = list(set(self.possible_moves[key_1]) - set.union(*union_set2))
-                else:
-                    check2 = self.possible_moves[key_1]
-
-
-                if len(check2) == 1 and check2[0] != 0:
-                    move = check2[0]
-                    self.board[key_1[0]][key_1[1]] = move
-                    del self.possible_moves[key_1] # remove key since it's done
-                    self._examine(key_1, move)
-                    continue
-
-                # Check block
-                union_set3 = []
-                block_row = key_1[0] // 3
-                block_col = key_1[1] // 3
-                for key_2 in self.possible_moves.keys():
-                    if key_2 != key_1:
-                        br = key_2[0] // 3
-                        bc = key_2[1] // 3
-                        if block_row == br and block_col == bc:
-                            union_set3.append(set(self.possible_moves[key_2]))
-
-                if union_set3:
-                    check3 = list(set(self.possible_moves[key_1]) - set.union(*union_set3))
-                else:
-                    check3 = self.possible_moves[key_1]
+                # Check the row, then the column, then the block
+                for unit in self._cell_units[key_1]:
+                    union_set = set()
+                    for key_2 in unit:
+                        if key_2 != key_1 and key_2 in self.possible_moves:
+                            union_set.update(self.possible_moves[key_2])
+
+                    check = list(set(self.possible_moves[key_1]) - union_set)
+                    if len(check) == 1 and check[0] != 0:
+                        move = check[0]
+                        self.cells[key_1] = move
+                        del self.possible_moves[key_1] # remove key since it's done
+                        self._examine(key_1, move)
+                        break
 
-                if len(check3) == 1 and check3[0] != 0:
-                    move = check3[0]
-                    self.board[key_1[0]][key_1[1]] = move
-                    del self.possible_moves[key_1]
-                    self._examine(key_1, move)
-        
         return
 
     # Method 3: brute force approach. Try every possible move until the entire board is valid.
@@ -166,11 +373,8 @@ class SudokuSolver():
         """
             DFS/brute force method. The easiest but most inefficient way to solve Sudoku.
         """
-        blank_cells = [] # a list of blank cells
-        for r in range(9):
-            for c in range(9):
-                if self.board[r][c] == 0:
-                    blank_cells.append((r, c))
+        blank_cells = [i for i in range(len(self.cells)) if self.cells[i] == 0] # a list of blank cells
+        self._search_size = len(blank_cells)
         self._solve_next(blank_cells)
         return
 
@@ -181,64 +385,504 @@ class SudokuSolver():
             return True
 
         cell = blank_cells.pop() # get next cell
+        depth = self._search_size - len(blank_cells)
         moves = self._calculate_moves(cell) # get a list of possible moves for this cell
+        hook = self.hook
 
         # try every move
         while moves:
-            self.board[cell[0]][cell[1]] = moves.pop()
+            move = moves.pop()
+            self.cells[cell] = move
+            self.nodes += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if hook is not None:
+                hook("place", (cell, move, depth))
             if self._check_board(cell):
                 if self._solve_next(blank_cells):
                     return True
+            self.backtracks += 1
+            if hook is not None:
+                hook("backtrack", (cell, move, depth))
 
         # none of the cell works, so we reset this cell go back to the parent node
-        self.board[cell[0]][cell[1]] = 0
+        self.cells[cell] = 0
         blank_cells.append(cell)
         return False
 
-    def _check_board(self, position):
+    def _check_board(self, cell):
         """
             Check if the move is valid by finding duplicates in row, column, and section.
         """
-        row, col = position
         checklist = []
-
-        # check row
-        for c in range(9):
-            number = self.board[row][c]
-            if number != 0:
-                if number in checklist:
-                    return False
-                else:
-                    checklist.append(number)
-
-        checklist.clear()
-
-        # check column
-        for r in range(9):
-            number = self.board[r][col]
-            if number != 0:
-                if number in checklist:
-                    return False
-                else:
-                    checklist.append(number)
-            
-        checklist.clear()
-
-        # check section
-        temp_r = (row // 3) * 3
-        section_c = (col // 3) * 3
-        for r in range(3):
-            section_r = temp_r + r
-            for c in range(3):
-                number = self.board[section_r][section_c + c]
+        for unit in self._cell_units[cell]:
+            for other in unit:
+                number = self.cells[other]
                 if number != 0:
                     if number in checklist:
                         return False
                     else:
                         checklist.append(number)
-                
+            checklist.clear()
+
+        return True
+
+    # Bitmask engine: the same steps as the classic engine (fill the singles, then
+    # search), but candidates and validity checks are constant-time bit operations
+    # on incrementally updated masks.
+    def _solve_bitmask(self):
+        """
+            Build the occupancy masks from the board, fill the naked and hidden
+            singles and run the bitmask search on the cells left, most constrained
+            first. Leaves the board untouched if the givens already contain a
+            duplicate.
+        """
+        if not self._init_masks():
+            return
+        if not self._run_phase("singles", self._fill_singles):
+            return
+
+        # pop() takes cells from the end, so put the fewest candidates there
+        blank_cells = [i for i in range(len(self.cells)) if self.cells[i] == 0]
+        blank_cells.sort(key=lambda cell: popcount(self._candidates(cell)), reverse=True)
+        self._search_size = len(blank_cells)
+        self._run_phase("search", lambda: self._solve_next_bitmask(blank_cells))
+        return
+
+    def _fill_singles(self):
+        """
+            Place naked singles (a cell with one candidate) and hidden singles (a
+            digit with one place left in a unit) until there are none. Return False
+            if a blank cell or a unit runs out of options.
+        """
+        cells = self.cells
+        units = self.geometry.units
+        all_digits = self._all_digits
+        progress = True
+        while progress:
+            progress = False
+            for cell in range(len(cells)):
+                if cells[cell] == 0:
+                    mask = self._candidates(cell)
+                    if not mask:
+                        return False
+                    if mask & (mask - 1) == 0:
+                        self._place(cell, mask)
+                        progress = True
+
+            for unit in units:
+                seen_once = 0
+                seen_twice = 0
+                placed = 0
+                for cell in unit:
+                    if cells[cell]:
+                        placed |= 1 << (cells[cell] - 1)
+                    else:
+                        mask = self._candidates(cell)
+                        seen_twice |= seen_once & mask
+                        seen_once |= mask
+                if (seen_once | placed) != all_digits:
+                    return False
+                hidden = seen_once & ~seen_twice & ~placed
+                for cell in unit:
+                    if hidden and cells[cell] == 0:
+                        bit = self._candidates(cell) & hidden
+                        if bit:
+                            if bit & (bit - 1):
+                                return False # two digits that both need this cell
+                            self._place(cell, bit)
+                            hidden ^= bit
+                            progress = True
+        return True
+
+    def _solve_next_bitmask(self, blank_cells):
+        """Recursive method for solving each cell using the occupancy masks."""
+        if not blank_cells:
+            return True
+
+        cell = blank_cells.pop()
+        depth = self._search_size - len(blank_cells)
+        candidates = self._candidates(cell)
+        hook = self.hook
+
+        while candidates:
+            bit = candidates & -candidates # lowest set bit
+            candidates ^= bit
+            self._place(cell, bit)
+            self.nodes += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if hook is not None:
+                hook("place", (cell, bit.bit_length(), depth))
+            if self._solve_next_bitmask(blank_cells):
+                return True
+            self._unplace(cell, bit)
+            self.backtracks += 1
+            if hook is not None:
+                hook("backtrack", (cell, bit.bit_length(), depth))
+
+        blank_cells.append(cell)
+        return False
+
+    # MRV engine: always branch on the empty cell with the fewest candidates and
+    # prune a branch as soon as a peer of the new move has no candidates left.
+    def _solve_mrv(self):
+        """
+            Build the occupancy masks from the board and run the MRV search.
+        """
+        if not self._init_masks():
+            return
+
+        blank_cells = [i for i in range(len(self.cells)) if self.cells[i] == 0]
+        self._search_size = len(blank_cells)
+        self._solve_next_mrv(blank_cells)
+        return
+
+    def _solve_next_mrv(self, blank_cells):
+        """Recursive method that branches on the most-constrained cell first."""
+        if not blank_cells:
+            return True
+
+        cell = self._pop_mrv(blank_cells)
+        if cell is None:
+            return False
+        depth = self._search_size - len(blank_cells)
+        candidates = self._candidates(cell)
+        hook = self.hook
+
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            self._place(cell, bit)
+            self.nodes += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if hook is not None:
+                hook("place", (cell, bit.bit_length(), depth))
+            if self._forward_check(cell) and self._solve_next_mrv(blank_cells):
+                return True
+            self._unplace(cell, bit)
+            self.backtracks += 1
+            if hook is not None:
+                hook("backtrack", (cell, bit.bit_length(), depth))
+
+        blank_cells.append(cell)
+        return False
+
+    def _pop_mrv(self, blank_cells):
+        """
+            Remove and return the blank cell with the fewest candidates, or None
+            (leaving the list as is) if some blank cell has no candidates at all.
+        """
+        best = 0
+        best_count = self.size + 1
+        for i, cell in enumerate(blank_cells):
+            count = popcount(self._candidates(cell))
+            if count < best_count:
+                best, best_count = i, count
+                if count <= 1:
+                    break
+        if best_count == 0:
+            return None
+
+        # move it to the end so it can be popped off like the other engines
+        blank_cells[best], blank_cells[-1] = blank_cells[-1], blank_cells[best]
+        return blank_cells.pop()
+
+    def _forward_check(self, cell):
+        """
+            Return False if any empty peer of the given cell has run out of candidates.
+        """
+        cells = self.cells
+        for peer in self._peers[cell]:
+            if cells[peer] == 0 and not self._candidates(peer):
+                return False
+        return True
+
+    # Count solutions with the same masks and MRV ordering as the mrv engine.
+    def count_solutions(self, limit=2):
+        """
+            Count the solutions of the loaded board without changing it, stopping as
+            soon as `limit` solutions have been found (None counts all of them). With
+            the default limit, 0 means no solution, 1 unique and 2 several.
+        """
+        if self.strategy == "dlx":
+            if self._dlx is None:
+                self._dlx = DancingLinks(size=self.size)
+            self._dlx.load(self.cells)
+            return self._dlx.count_solutions(limit)
+
+        self.nodes = 0
+        if not self._init_masks():
+            return 0
+        blank_cells = [i for i in range(len(self.cells)) if self.cells[i] == 0]
+        return self._count_next(blank_cells, limit)
+
+    def branches(self):
+        """
+            Return the boards (as bytes) reached by trying each candidate of the
+            most-constrained blank cell, skipping those that fail forward checking.
+            A full board is returned as its only branch; an invalid one has none.
+        """
+        if not self._init_masks():
+            return []
+        blank_cells = [i for i in range(len(self.cells)) if self.cells[i] == 0]
+        if not blank_cells:
+            return [bytes(self.cells)]
+        cell = self._pop_mrv(blank_cells)
+        if cell is None:
+            return []
+
+        boards = []
+        candidates = self._candidates(cell)
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            self._place(cell, bit)
+            if self._forward_check(cell):
+                boards.append(bytes(self.cells))
+            self._unplace(cell, bit)
+        return boards
+
+    def is_unique(self):
+        """
+            Return True if the loaded board has exactly one solution.
+        """
+        return self.count_solutions(limit=2) == 1
+
+    def _count_next(self, blank_cells, limit):
+        """Recursive method that counts solutions below the current placements."""
+        if not blank_cells:
+            return 1
+
+        cell = self._pop_mrv(blank_cells)
+        if cell is None:
+            return 0
+
+        total = 0
+        candidates = self._candidates(cell)
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            self._place(cell, bit)
+            self.nodes += 1
+            if self._forward_check(cell):
+                total += self._count_next(blank_cells, None if limit is None else limit - total)
+            self._unplace(cell, bit)
+            if limit is not None and total >= limit:
+                break
+
+        blank_cells.append(cell)
+        return total
+
+    # Iterative engine: the MRV search with forward checking, driven by an explicit
+    # stack so it can stop when a budget runs out and pick up again later.
+    def _solve_iterative(self, max_nodes, time_limit, restart):
+        """
+            Run the search loop until it finds a solution, exhausts the tree or runs
+            out of budget. Sets self.status to "timed_out" in the last case.
+        """
+        stack = self._stack
+        if restart:
+            if not self._init_masks():
+                return
+            self._search_size = self.get_empty_cell_count()
+            self._need_cell = True
+
+        stop_nodes = None if max_nodes is None else self.nodes + max_nodes
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        cells = self.cells
+        hook = self.hook
+        checks = 0
+
+        while True:
+            if self._need_cell:
+                # descend: pick the blank cell with the fewest candidates
+                best = -1
+                best_mask = 0
+                best_count = self.size + 1
+                for cell in range(len(self.cells)):
+                    if cells[cell] == 0:
+                        mask = self._candidates(cell)
+                        count = popcount(mask)
+                        if count < best_count:
+                            best, best_mask, best_count = cell, mask, count
+                            if count <= 1:
+                                break
+                if best < 0:
+                    return # every cell is filled
+                stack.append([best, best_mask, 0])
+                self._need_cell = False
+
+            # the budget is checked after looking for a blank cell, so running
+            # out on the last placement still reports the board as solved
+            if stop_nodes is not None and self.nodes >= stop_nodes:
+                self.status = "timed_out"
+                return
+            if deadline is not None:
+                checks += 1
+                if checks & 63 == 0 and time.perf_counter() >= deadline:
+                    self.status = "timed_out"
+                    return
+
+            frame = stack[-1]
+            cell, remaining, placed = frame
+            depth = len(stack)
+            if placed:
+                self._unplace(cell, placed)
+                self.backtracks += 1
+                if hook is not None:
+                    hook("backtrack", (cell, placed.bit_length(), depth))
+                frame[2] = 0
+            if not remaining:
+                stack.pop()
+                if not stack:
+                    return # the whole tree has been explored
+                continue
+
+            bit = remaining & -remaining
+            frame[1] = remaining ^ bit
+            frame[2] = bit
+            self._place(cell, bit)
+            self.nodes += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if hook is not None:
+                hook("place", (cell, bit.bit_length(), depth))
+            if self._forward_check(cell):
+                self._need_cell = True
+
+    # Propagate engine: run the deduction techniques to a fixpoint before searching
+    # and again after every guess, branching on the cell with the fewest candidates.
+    def _solve_propagate(self):
+        """
+            Solve the board with constraint propagation, falling back to search only
+            when the techniques get stuck.
+        """
+        propagator = self._propagator
+        propagator.reset()
+        self.technique_hits = propagator.hits
+        if not self._init_masks():
+            return
+
+        blanks = self.get_empty_cell_count()
+        start = time.perf_counter()
+        cells = bytearray(self.cells)
+        candidates = [self._candidates(i) if cells[i] == 0 else 1 << (cells[i] - 1) for i in range(len(self.cells))]
+        consistent = propagator.propagate(cells, candidates)
+        if consistent:
+            self.cells[:] = cells # deductions hold for any solution, so keep them
+        self._end_phase("propagate", start, blanks)
+        if not consistent:
+            return
+
+        blanks = self.get_empty_cell_count()
+        start = time.perf_counter()
+        if self._solve_next_propagate(cells, candidates, 1):
+            self.cells[:] = cells
+        self._end_phase("search", start, blanks)
+        return
+
+    def _solve_next_propagate(self, cells, candidates, depth):
+        """Recursive method that guesses on a copy of the state and propagates."""
+        best = -1
+        best_count = self.size + 1
+        for i in range(len(self.cells)):
+            if cells[i] == 0:
+                count = popcount(candidates[i])
+                if count < best_count:
+                    best, best_count = i, count
+                    if count == 2:
+                        break
+        if best < 0:
+            return True
+
+        remaining = candidates[best]
+        hook = self.hook
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            self.nodes += 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if hook is not None:
+                hook("place", (best, bit.bit_length(), depth))
+            trial_cells = bytearray(cells)
+            trial_candidates = candidates[:]
+            if self._propagator.place(trial_cells, trial_candidates, best, bit) \
+                    and self._propagator.propagate(trial_cells, trial_candidates) \
+                    and self._solve_next_propagate(trial_cells, trial_candidates, depth + 1):
+                cells[:] = trial_cells
+                return True
+            self.backtracks += 1
+            if hook is not None:
+                hook("backtrack", (best, bit.bit_length(), depth))
+        return False
+
+    # DLX engine: treat the board as an exact cover problem.
+    def _solve_dlx(self):
+        """
+            Solve the board with the dancing links backend.
+        """
+        if self._dlx is None:
+            self._dlx = DancingLinks(size=self.size)
+        dlx = self._dlx
+        dlx.hook = self.hook
+        dlx.load(self.cells)
+        solution = next(dlx.iter_solutions(), None)
+        self.nodes = dlx.nodes
+        self.backtracks = dlx.backtracks
+        self.max_depth = dlx.max_depth
+        if solution is None:
+            return
+        self.cells[:] = bytes(number for row in solution for number in row)
+        return
+
+    def _init_masks(self):
+        """
+            Rebuild the row, column and box masks from the board.
+            Return False if the board contains duplicates.
+        """
+        for i in range(self.size):
+            self.row_masks[i] = 0
+            self.col_masks[i] = 0
+            self.box_masks[i] = 0
+        for i, number in enumerate(self.cells):
+            if number == 0:
+                continue
+            bit = 1 << (number - 1)
+            row, col, box = self._row_of[i], self._col_of[i], self._box_of[i]
+            if (self.row_masks[row] | self.col_masks[col] | self.box_masks[box]) & bit:
+                return False
+            self.row_masks[row] |= bit
+            self.col_masks[col] |= bit
+            self.box_masks[box] |= bit
         return True
 
+    def _candidates(self, cell):
+        """
+            Return the mask of digits that can still be placed in a cell.
+        """
+        return self._all_digits & ~(self.row_masks[self._row_of[cell]] | self.col_masks[self._col_of[cell]] | self.box_masks[self._box_of[cell]])
+
+    def _place(self, cell, bit):
+        """
+            Write the digit for a single-bit mask into the board and mark it as used.
+        """
+        self.cells[cell] = bit.bit_length()
+        self.row_masks[self._row_of[cell]] |= bit
+        self.col_masks[self._col_of[cell]] |= bit
+        self.box_masks[self._box_of[cell]] |= bit
+
+    def _unplace(self, cell, bit):
+        """
+            Undo a previous _place.
+        """
+        self.cells[cell] = 0
+        self.row_masks[self._row_of[cell]] &= ~bit
+        self.col_masks[self._col_of[cell]] &= ~bit
+        self.box_masks[self._box_of[cell]] &= ~bit
+
     # Clean up the possible moves
     def _clean(self):
         """
@@ -250,72 +894,264 @@ class SudokuSolver():
                 del self.possible_moves[key]
         return
 
-    def _examine(self, position, move):
+    def _examine(self, cell, move):
         """
             Update the neighboring blank cells that have been affected by the move.
         """
-        # find which section we're in
-        cell_row = position[0] // 3
-        cell_col = position[1] // 3
- 
-        for key, value in self.possible_moves.items():
-            # if it's on the same row, column, or section
-            if key[0] == position[0] or key[1] == position[1] or (key[0] // 3 == cell_row and key[1] // 3 == cell_col):
-                # if the move affect this current cell
-                if move in value:
-                    value.remove(move)
-                    if len(value) == 1 and value[0] != 0:
-                        new_move = value[0]
-                        self.board[key[0]][key[1]] = new_move
-                        value[0] = 0
-                        self._examine(key, new_move)
+        for key in self._peers[cell]:
+            value = self.possible_moves.get(key)
+            # if the move affect this blank cell
+            if value and move in value:
+                value.remove(move)
+                if len(value) == 1 and value[0] != 0:
+                    new_move = value[0]
+                    self.cells[key] = new_move
+                    value[0] = 0
+                    self._examine(key, new_move)
 
         return
 
-    def _calculate_moves(self, position):
+    def _calculate_moves(self, cell):
         """
             Return a list of valid/possible moves for a cell.
         """
-        invalid_moves = [] # list of numbers that are already in the neighboring row, column, section
-        valid_moves = [1, 2, 3, 4, 5, 6, 7, 8, 9] # return variable
-
-        # check row
-        for c in range(9):
-            current = self.board[position[0]][c]
-            if current != 0:
-                invalid_moves.append(current)
-
-        # check col
-        for r in range(9):
-            current = self.board[r][position[1]]
-            if current != 0 and current not in invalid_moves:
-                invalid_moves.append(current)
-
-        # check block
-        start_row = position[0] - position[0] % 3
-        start_col = position[1] - position[1] % 3
-        for r in range(3):
-            curr_row = start_row + r
-            for c in range(3):
-                curr_col = start_col + c
-                current = self.board[curr_row][curr_col]
-                if current != 0 and current not in invalid_moves:
-                    invalid_moves.append(current)
-
-        # remove invalid_moves
-        for n in invalid_moves:
-            if n in valid_moves:
-                valid_moves.remove(n)
-
-        return valid_moves
+        # numbers that are already in the neighboring row, column, section
+        invalid_moves = {self.cells[peer] for peer in self._peers[cell]}
+        return [n for n in range(1, self.size + 1) if n not in invalid_moves]
 
     def get_empty_cell_count(self):
         """
             Count the number of blank cells.
         """
-        num_of_blanks = 0
-        for r in range(9):
-            for c in range(9):
-                if self.board[r][c] == 0:
-                    num_of_blanks += 1
-        return num_of_blanks
+        return self.cells.count(0)
+
+
+class DancingLinks():
+    """
+        Exact cover solver for Sudoku using Knuth's Algorithm X with dancing links.
+
+        The constraint columns (324 on a 9x9 board) are, in order: each cell holds a
+        digit, each row holds each digit, each column holds each digit and each box
+        holds each digit. Each candidate row (cell, digit) covers exactly four of them.
+    """
+    def __init__(self, board=None, hook=None, size=9):
+        # search counters and event hook, as described on SudokuSolver
+        self.hook = hook
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.valid = True
+        self._selected = [] # candidate rows chosen by the current search path
+
+        g = geometry(size)
+        self.board_size = size
+        cells = g.cells
+
+        # Node 0 is the root and nodes 1..columns are column headers.
+        columns = 4 * cells
+        self.left = list(range(-1, columns)) # left[0] fixed below
+        self.right = list(range(1, columns + 2))
+        self.left[0] = columns
+        self.right[columns] = 0
+        self.up = list(range(columns + 1))
+        self.down = list(range(columns + 1))
+        self.column = list(range(columns + 1))
+        self.size = [0] * (columns + 1)
+        self.row_id = [-1] * (columns + 1)
+
+        for cell in range(cells):
+            row, col, box = g.row_of[cell], g.col_of[cell], g.box_of[cell]
+            for d in range(size):
+                self._add_row(cell * size + d, (
+                    1 + cell,
+                    1 + cells + row * size + d,
+                    1 + 2 * cells + col * size + d,
+                    1 + 3 * cells + box * size + d,
+                ))
+
+        if board is not None:
+            self.load(board)
+
+    def load(self, board):
+        """
+            Release the givens of the previous board and select the givens of a new
+            one, so the matrix is built only once per instance. The board may be a
+            list of rows or the flat row-major cells.
+        """
+        if len(board) == self.board_size:
+            board = [number for row in board for number in row]
+        while self._selected:
+            self._unselect(self._selected.pop())
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.valid = True
+
+        # Select the rows for the givens up front. A given whose constraints were
+        # already covered by another given means the board has no solution.
+        for cell, number in enumerate(board):
+            number = int(number)
+            if number == 0:
+                continue
+            node = self._find_row(cell * self.board_size + number - 1)
+            if node is None:
+                self.valid = False
+                return
+            self._select(node)
+
+    def _add_row(self, row_id, columns):
+        """
+            Append a circular row of nodes, one per column, to the matrix.
+        """
+        first = len(self.column)
+        for i, col in enumerate(columns):
+            node = first + i
+            self.left.append(node - 1 if i else first + len(columns) - 1)
+            self.right.append(node + 1 if i < len(columns) - 1 else first)
+            self.up.append(self.up[col])
+            self.down.append(col)
+            self.down[self.up[col]] = node
+            self.up[col] = node
+            self.column.append(col)
+            self.row_id.append(row_id)
+            self.size[col] += 1
+
+    def _find_row(self, row_id):
+        """
+            Return the first node of a candidate row that is still in the matrix.
+        """
+        col = 1 + row_id // self.board_size # the cell constraint of this candidate
+        node = self.down[col]
+        while node != col:
+            if self.row_id[node] == row_id:
+                return node
+            node = self.down[node]
+        return None
+
+    def _select(self, node):
+        """
+            Permanently add a candidate row to the solution by covering its columns.
+        """
+        self._selected.append(node)
+        self._cover(self.column[node])
+        j = self.right[node]
+        while j != node:
+            self._cover(self.column[j])
+            j = self.right[j]
+
+    def _unselect(self, node):
+        """
+            Undo _select for a row that has already been removed from _selected.
+        """
+        j = self.left[node]
+        while j != node:
+            self._uncover(self.column[j])
+            j = self.left[j]
+        self._uncover(self.column[node])
+
+    def _cover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, col):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def iter_solutions(self):
+        """
+            Lazily yield every solution as a list of rows. The matrix is restored
+            when the generator finishes or is closed early, so it can be searched again.
+        """
+        if self.valid:
+            yield from self._search(1)
+
+    def count_solutions(self, limit=None):
+        """
+            Count the solutions, stopping once `limit` of them have been found.
+        """
+        count = 0
+        for _ in self.iter_solutions():
+            count += 1
+            if limit is not None and count >= limit:
+                break
+        return count
+
+    def _search(self, depth):
+        right, down, size = self.right, self.down, self.size
+        if right[0] == 0:
+            yield self._board()
+            return
+
+        # choose the column with the fewest remaining rows
+        col = right[0]
+        best = col
+        while col != 0:
+            if size[col] < size[best]:
+                best = col
+                if size[col] <= 1:
+                    break
+            col = right[col]
+        if size[best] == 0:
+            return
+
+        hook = self.hook
+        self._cover(best)
+        try:
+            node = down[best]
+            while node != best:
+                self.nodes += 1
+                if depth > self.max_depth:
+                    self.max_depth = depth
+                if hook is not None:
+                    self._emit("place", node, depth)
+                self._selected.append(node)
+                j = right[node]
+                while j != node:
+                    self._cover(self.column[j])
+                    j = right[j]
+                try:
+                    yield from self._search(depth + 1)
+                    self.backtracks += 1
+                    if hook is not None:
+                        self._emit("backtrack", node, depth)
+                finally:
+                    j = self.left[node]
+                    while j != node:
+                        self._uncover(self.column[j])
+                        j = self.left[j]
+                    self._selected.pop()
+                node = down[node]
+        finally:
+            self._uncover(best)
+
+    def _emit(self, event, node, depth):
+        cell, digit = divmod(self.row_id[node], self.board_size)
+        self.hook(event, (cell, digit + 1, depth))
+
+    def _board(self):
+        size = self.board_size
+        board = [[0] * size for _ in range(size)]
+        for node in self._selected:
+            cell, digit = divmod(self.row_id[node], size)
+            board[cell // size][cell % size] = digit + 1
+        return board
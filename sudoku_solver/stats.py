@@ -0,0 +1,45 @@
+class SolveStats():
+    """
+        Counters collected by one call to SudokuSolver.solve().
+
+        `status` is "solved", "unsolved" or "timed_out" (iterative strategy only).
+        Phases are named after the engine step that ran, e.g. "solve1", "solve2" and
+        "solve3" for the classic strategy, "singles" and "search" for bitmask or
+        "propagate" and "search" for the others.
+        `backtracks` counts trial placements that had to be undone and `max_depth`
+        is the deepest level (number of guesses stacked up) the search reached.
+    """
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.status = None
+        self.solved = False
+        self.total_time = 0.0
+        self.phase_times = {}
+        self.cells_filled = {}
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.technique_hits = {}
+
+    def add_phase(self, name, seconds, filled):
+        self.phase_times[name] = self.phase_times.get(name, 0.0) + seconds
+        self.cells_filled[name] = self.cells_filled.get(name, 0) + filled
+
+    def as_dict(self):
+        return {
+            "strategy": self.strategy,
+            "status": self.status,
+            "solved": self.solved,
+            "total_time": self.total_time,
+            "phase_times": dict(self.phase_times),
+            "cells_filled": dict(self.cells_filled),
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "max_depth": self.max_depth,
+            "technique_hits": dict(self.technique_hits),
+        }
+
+    def __repr__(self):
+        return (f"SolveStats(strategy={self.strategy!r}, status={self.status!r}, "
+                f"total_time={self.total_time:.6f}, nodes={self.nodes}, "
+                f"backtracks={self.backtracks}, max_depth={self.max_depth})")
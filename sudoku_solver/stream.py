@@ -0,0 +1,80 @@
+import os
+
+from .solver import SudokuSolver
+
+def parse_line(line):
+    """
+        Parse a puzzle in the one-line format (81 characters, `0` or `.` for blanks)
+        into a 9x9 board.
+    """
+    line = line.strip()
+    if len(line) != 81:
+        raise ValueError(f"Expected 81 characters but got {len(line)}.")
+
+    board = [[0] * 9 for _ in range(9)]
+    for i, char in enumerate(line):
+        if char == '.':
+            continue
+        if not '0' <= char <= '9':
+            raise ValueError(f"Invalid character '{char}' at position {i + 1}.")
+        board[i // 9][i % 9] = ord(char) - 48
+    return board
+
+def format_board(board):
+    """
+        Format a 9x9 board as a single 81-character line.
+    """
+    return ''.join(str(board[r][c]) for r in range(9) for c in range(9))
+
+def iter_puzzles(source):
+    """
+        Lazily yield 9x9 boards from a path or an open text file.
+
+        Each non-empty line is either a whole puzzle in the one-line format or one
+        row of a comma-separated board, in which case nine such lines make a puzzle.
+        Malformed input raises ValueError with the offending line number.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r") as rFile:
+            yield from _iter_lines(rFile)
+    else:
+        yield from _iter_lines(source)
+
+def _iter_lines(lines):
+    rows = []
+    line_number = 0
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            if ',' in line:
+                row = [int(num) for num in line.split(",")]
+                if len(row) != 9:
+                    raise ValueError(f"Expected 9 numbers but got {len(row)}.")
+                rows.append(row)
+                if len(rows) == 9:
+                    yield rows
+                    rows = []
+            elif rows:
+                raise ValueError("Incomplete comma-separated board.")
+            else:
+                yield parse_line(line)
+        except ValueError as e:
+            raise ValueError(f"Line {line_number}: {e}") from None
+    if rows:
+        raise ValueError(f"Line {line_number}: Incomplete comma-separated board.")
+
+def solve_stream(puzzles, solver=None, strategy=None):
+    """
+        Lazily solve an iterable of puzzles with a single solver instance.
+
+        Puzzles may be anything SudokuSolver.load_board accepts. The solved board is
+        yielded as a new 9x9 list; a puzzle that cannot be solved keeps its blank cells.
+    """
+    if solver is None:
+        solver = SudokuSolver(strategy)
+    for puzzle in puzzles:
+        solver.load_board(puzzle)
+        solver.solve()
+        yield solver.board
@@ -0,0 +1,58 @@
+# Precomputed board geometry shared by the solving engines. Cells are indexed
+# 0 to size * size - 1 in row-major order and candidate digit n is stored as
+# bit (n - 1) of a Python int, so masks grow with the board size.
+
+# Supported board sizes: the box side squared.
+SIZES = (4, 9, 16, 25)
+
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else: # Python < 3.10
+    def popcount(mask):
+        return bin(mask).count("1")
+
+class Geometry():
+    """
+        Index tables for a board of `size` x `size` cells with `box` x `box` boxes.
+    """
+    def __init__(self, size):
+        if size not in SIZES:
+            raise ValueError(f"Unsupported board size {size}. Choose from: {', '.join(map(str, SIZES))}.")
+        box = int(round(size ** 0.5))
+        self.size = size
+        self.box = box
+        self.cells = size * size
+
+        # Bit mask with one bit set for each digit 1..size.
+        self.all_digits = (1 << size) - 1
+
+        # Row, column and box of each cell.
+        self.row_of = bytes(i // size for i in range(self.cells))
+        self.col_of = bytes(i % size for i in range(self.cells))
+        self.box_of = bytes((i // (size * box)) * box + (i % size) // box for i in range(self.cells))
+
+        # The units: rows, then columns, then boxes, each a tuple of cells.
+        self.units = tuple(
+            [tuple(i for i in range(self.cells) if self.row_of[i] == n) for n in range(size)]
+            + [tuple(i for i in range(self.cells) if self.col_of[i] == n) for n in range(size)]
+            + [tuple(i for i in range(self.cells) if self.box_of[i] == n) for n in range(size)]
+        )
+
+        # The row, column and box unit each cell belongs to.
+        self.cell_units = tuple(
+            (self.units[self.row_of[i]], self.units[size + self.col_of[i]], self.units[2 * size + self.box_of[i]])
+            for i in range(self.cells)
+        )
+
+        # The cells sharing a row, column or box with each cell (20 on a 9x9 board).
+        self.peers = tuple(tuple(sorted(set().union(*self.cell_units[i]) - {i})) for i in range(self.cells))
+
+_geometries = {}
+
+def geometry(size=9):
+    """
+        Return the shared Geometry for a board size, building it on first use.
+    """
+    if size not in _geometries:
+        _geometries[size] = Geometry(size)
+    return _geometries[size]
@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from sudoku_solver import SudokuSolver
+from sudoku_solver.cache import SolutionCache, canonical_form
+from sudoku_solver.tables import geometry
+
+PUZZLES = [
+    "530070000600195000098000060800060003400803001700020006060000280000419005000080079",
+    "200057000000000080416200070172600000054020730000004218040002895090000000000430007",
+    "000000000000003085001020000000507000004000100090000000500000073002010000000040009",
+]
+
+def _cells(puzzle):
+    solver = SudokuSolver(size=9)
+    solver.load_board(puzzle)
+    return bytes(solver.cells)
+
+def _variant(cells, rng, size=9):
+    """
+        Relabel the digits, shuffle the bands, stacks and the lines within them,
+        and transpose half of the time.
+    """
+    box = geometry(size).box
+    digits = [0] + rng.sample(range(1, size + 1), size)
+
+    def lines():
+        return [band * box + line for band in rng.sample(range(box), box) for line in rng.sample(range(box), box)]
+
+    rows, cols = lines(), lines()
+    transposed = rng.random() < 0.5
+    return bytes(digits[cells[c * size + r] if transposed else cells[r * size + c]] for r in rows for c in cols)
+
+def _assert_solves(puzzle, solution, size=9):
+    assert len(solution) == len(puzzle)
+    assert all(given == 0 or given == number for given, number in zip(puzzle, solution))
+    for unit in geometry(size).units:
+        assert sorted(solution[cell] for cell in unit) == list(range(1, size + 1))
+
+@pytest.mark.parametrize("puzzle", PUZZLES)
+def test_canonical_form_is_shared_by_variants(puzzle):
+    rng = random.Random(puzzle)
+    cells = _cells(puzzle)
+    key = canonical_form(cells)[0]
+    for _ in range(10):
+        assert canonical_form(_variant(cells, rng))[0] == key
+
+@pytest.mark.parametrize("puzzle", PUZZLES)
+def test_canonical_form_maps_back_to_the_board(puzzle):
+    cells = _cells(puzzle)
+    key, positions, relabel = canonical_form(cells)
+    assert key == bytes(relabel[cells[position]] for position in positions)
+    assert sorted(positions) == list(range(len(cells)))
+    assert sorted(relabel[1:10]) == list(range(1, 10))
+
+def test_variants_get_valid_solutions_from_the_cache():
+    rng = random.Random(1)
+    cache = SolutionCache()
+    solver = SudokuSolver("dlx", cache=cache)
+    for puzzle in PUZZLES:
+        solver.load_board(puzzle)
+        assert solver.solve().solved
+        for _ in range(5):
+            variant = _variant(_cells(puzzle), rng)
+            solution, _ = cache.lookup(variant)
+            assert solution is not None
+            _assert_solves(variant, solution)
+    assert cache.misses == len(PUZZLES)
+
+def test_solver_fills_board_from_the_cache():
+    cache = SolutionCache()
+    solver = SudokuSolver("propagate", cache=cache)
+    solver.load_board(PUZZLES[0])
+    solver.solve()
+    variant = _variant(_cells(PUZZLES[0]), random.Random(2))
+    solver.load_board(variant)
+    assert solver.solve().solved
+    assert cache.hits == 1
+    _assert_solves(variant, solver.to_bytes())
+
+def test_resumed_search_stores_its_solution():
+    cache = SolutionCache()
+    solver = SudokuSolver("iterative", cache=cache)
+    solver.load_board(PUZZLES[2])
+    solver.solve(max_nodes=5)
+    assert solver.status == "timed_out"
+    assert solver.resume().solved
+
+    solver.load_board(PUZZLES[2])
+    assert solver.solve().solved
+    assert cache.hits == 1
+    _assert_solves(_cells(PUZZLES[2]), solver.to_bytes())
+
+def test_solutions_survive_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SolutionCache(path=path)
+    solver = SudokuSolver("dlx", cache=cache)
+    solver.load_board(PUZZLES[1])
+    solver.solve()
+    cache.close()
+
+    cache = SolutionCache(path=path)
+    variant = _variant(_cells(PUZZLES[1]), random.Random(3))
+    solution, _ = cache.lookup(variant)
+    cache.close()
+    assert cache.disk_hits == 1
+    _assert_solves(variant, solution)